@@ -0,0 +1,171 @@
+"""Generate a synthetic source tree to benchmark message extraction.
+
+Usage: python benchmarks/corpus.py DIRECTORY [FILES [MESSAGES [FILLER]]]
+
+This creates FILES Python modules, Chameleon templates, Zope templates and
+ZCML files in DIRECTORY, each with MESSAGES translatable messages. FILLER
+controls how many lines without messages are added after each message.
+"""
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+import io
+import os
+import sys
+
+
+KINDS = ["py", "pt", "zpt", "zcml"]
+
+TEMPLATE_HEADER = """\
+<html xmlns="http://www.w3.org/1999/xhtml"
+      xmlns:tal="http://xml.zope.org/namespaces/tal"
+      xmlns:i18n="http://xml.zope.org/namespaces/i18n"
+      i18n:domain="benchmark">
+  <body>
+"""
+
+TEMPLATE_FOOTER = """\
+  </body>
+</html>
+"""
+
+
+def python_module(index, messages, filler):
+    lines = [
+        "# Generated module %d" % index,
+        "import os",
+        "from benchmark.i18n import _",
+        "from benchmark.i18n import ngettext",
+        "",
+        "",
+        "def view_%d(request, count):" % index,
+        "    result = []",
+    ]
+    for i in range(messages):
+        text = "message %d in module %d" % (i, index)
+        kind = i % 4
+        if kind == 0:
+            lines.append("    # I18N: Comment for %s" % text)
+            lines.append('    result.append(_(u"Plain %s"))' % text)
+        elif kind == 1:
+            lines.append(
+                '    result.append(ngettext(u"One %s", u"%%d %s", count))'
+                % (text, text)
+            )
+        elif kind == 2:
+            lines.append(
+                '    result.append(_(u"msgid_%d_%d", default=u"Default %s",'
+                ' mapping={"count": count}))' % (index, i, text)
+            )
+        else:
+            lines.append('    result.append(_(u"Context %s", context="button"))' % text)
+        for j in range(filler):
+            lines.append('    path = os.path.join("dir_%d", "file_%d")' % (i, j))
+    lines.append("    return result")
+    return "\n".join(lines) + "\n"
+
+
+def chameleon_template(index, messages, filler):
+    lines = [TEMPLATE_HEADER]
+    for i in range(messages):
+        text = "message %d in template %d" % (i, index)
+        kind = i % 3
+        if kind == 0:
+            lines.append('    <p i18n:translate="">Text %s</p>\n' % text)
+        elif kind == 1:
+            lines.append(
+                '    <a href="${url}" title="Title %s"'
+                ' i18n:attributes="title">${label}</a>\n' % text
+            )
+        else:
+            lines.append("    <p>${_(u'Expression %s')}</p>\n" % text)
+        for j in range(filler):
+            lines.append(
+                '    <div class="filler-%d" tal:condition="show">%d</div>\n' % (j, i)
+            )
+    lines.append(TEMPLATE_FOOTER)
+    return "".join(lines)
+
+
+def zope_template(index, messages, filler):
+    lines = [TEMPLATE_HEADER]
+    for i in range(messages):
+        text = "message %d in template %d" % (i, index)
+        if i % 2 == 0:
+            lines.append('    <p i18n:translate="">Text %s</p>\n' % text)
+        else:
+            lines.append(
+                '    <a tal:attributes="href context/absolute_url"'
+                ' title="Title %s" i18n:attributes="title">Link</a>\n' % text
+            )
+        for j in range(filler):
+            lines.append(
+                '    <div class="filler-%d" tal:content="context/title">%d</div>\n'
+                % (j, i)
+            )
+    lines.append(TEMPLATE_FOOTER)
+    return "".join(lines)
+
+
+def zcml_file(index, messages, filler):
+    lines = [
+        '<configure xmlns="http://namespaces.zope.org/zope"\n'
+        '           xmlns:browser="http://namespaces.zope.org/browser"\n'
+        '           i18n_domain="benchmark">\n'
+    ]
+    for i in range(0, messages, 2):
+        description = ""
+        if i + 1 < messages:
+            description = ' description="Description %d in file %d"' % (i + 1, index)
+        lines.append(
+            '  <browser:page name="page_%d" title="Title %d in file %d"%s />\n'
+            % (i, i, index, description)
+        )
+        for j in range(filler):
+            lines.append('  <include package=".filler_%d_%d" />\n' % (i, j))
+    lines.append("</configure>\n")
+    return "".join(lines)
+
+
+GENERATORS = {
+    "py": python_module,
+    "pt": chameleon_template,
+    "zpt": zope_template,
+    "zcml": zcml_file,
+}
+
+
+def generate(directory, files=100, messages=20, filler=5, kinds=KINDS):
+    """Generate a corpus in a directory.
+
+    This returns an ordered dictionary which maps every kind of file to a
+    list of the generated filenames and the number of messages in them.
+    """
+    corpus = OrderedDict()
+    for kind in kinds:
+        kind_directory = os.path.join(directory, kind)
+        if not os.path.isdir(kind_directory):
+            os.makedirs(kind_directory)
+        filenames = []
+        for index in range(files):
+            filename = os.path.join(kind_directory, "file%d.%s" % (index, kind))
+            with io.open(filename, "w", encoding="utf-8") as output:
+                output.write(GENERATORS[kind](index, messages, filler))
+            filenames.append(filename)
+        corpus[kind] = {"files": filenames, "messages": files * messages}
+    return corpus
+
+
+def main(directory, files=100, messages=20, filler=5):
+    corpus = generate(directory, files, messages, filler)
+    for (kind, info) in corpus.items():
+        print(
+            "%-5s %6d files %8d messages" % (kind, len(info["files"]), info["messages"])
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    main(sys.argv[1], *[int(arg) for arg in sys.argv[2:5]])
@@ -0,0 +1,90 @@
+"""Measure the memory used by a catalog while merging extracted messages and
+saving it as a POT file.
+
+Usage: python benchmarks/memory.py [SIZE ...]
+
+This compares a catalog of ``POEntry`` objects with the compact catalog used
+by ``pot-create``.
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+from lingua.extract import CompactCatalog
+from lingua.extract import POEntry
+from lingua.extract import create_catalog
+from lingua.extract import save_catalog
+from merge import generate_messages
+
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def merge_pofile(messages):
+    catalog = create_catalog(79, None, "PACKAGE", "1.0", None)
+    entries = {}
+    for message in messages:
+        key = (message.msgctxt, message.msgid)
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = POEntry(msgctxt=message.msgctxt, msgid=message.msgid)
+            catalog.append(entry)
+        entry.update(message)
+    return catalog
+
+
+def merge_compact(messages):
+    catalog = CompactCatalog(create_catalog(79, None, "PACKAGE", "1.0", None))
+    catalog.merge(messages)
+    return catalog
+
+
+def run(function, count):
+    """Return the peak memory used to merge messages, and the peak memory used
+    to merge messages and save the catalog, in MiB."""
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, "messages.pot")
+    tracemalloc.start()
+    # Messages are generated while merging, like they are by pot-create.
+    catalog = function(generate_messages(count))
+    merged = tracemalloc.get_traced_memory()[1]
+    save_catalog(catalog, filename)
+    saved = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del catalog
+    os.unlink(filename)
+    os.rmdir(directory)
+    return (merged / 1048576.0, saved / 1048576.0)
+
+
+def main(sizes):
+    print("Peak memory use in MiB while merging, and while merging and saving.")
+    print(
+        "%10s %14s %14s %14s %14s %8s"
+        % (
+            "messages",
+            "POFile merge",
+            "POFile save",
+            "compact merge",
+            "compact save",
+            "ratio",
+        )
+    )
+    for count in sizes:
+        (pofile_merged, pofile_saved) = run(merge_pofile, count)
+        (compact_merged, compact_saved) = run(merge_compact, count)
+        print(
+            "%10d %14.1f %14.1f %14.1f %14.1f %7.1fx"
+            % (
+                count,
+                pofile_merged,
+                pofile_saved,
+                compact_merged,
+                compact_saved,
+                pofile_saved / compact_saved,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
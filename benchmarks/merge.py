@@ -0,0 +1,46 @@
+"""Measure how merging extracted messages into a catalog scales.
+
+Usage: python benchmarks/merge.py [SIZE ...]
+"""
+import sys
+import time
+from lingua.extract import CompactCatalog
+from lingua.extract import create_catalog
+from lingua.extractors import Message
+
+
+DEFAULT_SIZES = [1000, 10000, 50000, 100000]
+
+
+def generate_messages(count):
+    for i in range(count):
+        # Every message is seen twice, in two different files.
+        for filename in ["module_a.py", "module_b.py"]:
+            yield Message(
+                None,
+                "Message number %d" % i,
+                None,
+                [],
+                "",
+                "",
+                (filename, i + 1),
+            )
+
+
+def run(count):
+    catalog = CompactCatalog(create_catalog(79, None, "PACKAGE", "1.0", None))
+    messages = list(generate_messages(count))
+    start = time.perf_counter()
+    catalog.merge(messages)
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    print("%10s %12s %14s" % ("messages", "seconds", "messages/s"))
+    for count in sizes:
+        elapsed = run(count)
+        print("%10d %12.3f %14.0f" % (count, elapsed, count / elapsed))
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,250 @@
+"""Measure message extraction throughput.
+
+Usage: python benchmarks/run.py [OPTIONS]
+
+This generates a synthetic corpus (see ``corpus.py``) and measures how fast
+every extractor processes its files, how fast ``pot-create`` processes the
+whole corpus, and how fast extracted messages are merged into a catalog.
+Every benchmark runs in a separate process so its peak memory use can be
+measured.
+
+Use ``--save`` to store the results as a baseline, and ``--compare`` to
+compare a run against a baseline. The exit code is 1 if the throughput of
+any benchmark dropped by more than the threshold.
+"""
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import click
+import corpus
+import merge
+from lingua import __version__
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in KiB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # macOS reports bytes instead of kilobytes.
+        rss //= 1024
+    return rss
+
+
+def bench_extractor(filenames, repeat):
+    from lingua.extract import ExtractorOptions
+    from lingua.extractors import get_extractor
+    from lingua.extractors import register_extractors
+
+    register_extractors()
+    options = ExtractorOptions(comment_tag=True, domain=None, keywords=[])
+    best = None
+    for i in range(repeat):
+        messages = 0
+        start = time.perf_counter()
+        for filename in filenames:
+            messages += len(list(get_extractor(filename)(filename, options)))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return (best, len(filenames), messages)
+
+
+def bench_pipeline(directory, files, messages, jobs, repeat):
+    from lingua.extract import main
+
+    output = os.path.join(directory, "benchmark.pot")
+    args = ["-o", output, "--jobs", str(jobs)]
+    args.extend(os.path.join(directory, kind) for kind in corpus.KINDS)
+    best = None
+    for i in range(repeat):
+        if os.path.exists(output):
+            os.unlink(output)
+        start = time.perf_counter()
+        main.main(args, standalone_mode=False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return (best, files, messages)
+
+
+def bench_merge(count, repeat):
+    best = min(merge.run(count) for i in range(repeat))
+    return (best, 0, count * 2)
+
+
+def _measure(function, args):
+    (seconds, files, messages) = function(*args)
+    return OrderedDict(
+        [
+            ("seconds", seconds),
+            ("files", files),
+            ("messages", messages),
+            ("files_per_second", files / seconds if files else None),
+            ("messages_per_second", messages / seconds),
+            ("peak_rss_kb", peak_rss()),
+        ]
+    )
+
+
+def measure(function, *args):
+    """Run a benchmark in a new process and return its results."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_measure, function, args).result()
+
+
+def run_benchmarks(directory, files, messages, filler, jobs, repeat):
+    generated = corpus.generate(directory, files, messages, filler)
+    results = OrderedDict()
+    for (kind, info) in generated.items():
+        results["extract-%s" % kind] = measure(bench_extractor, info["files"], repeat)
+    results["pot-create"] = measure(
+        bench_pipeline,
+        directory,
+        sum(len(info["files"]) for info in generated.values()),
+        sum(info["messages"] for info in generated.values()),
+        jobs,
+        repeat,
+    )
+    results["merge"] = measure(
+        bench_merge, sum(info["messages"] for info in generated.values()), repeat
+    )
+    return results
+
+
+def print_results(results):
+    print(
+        "%-14s %10s %10s %12s %12s"
+        % ("benchmark", "seconds", "files/s", "messages/s", "peak RSS")
+    )
+    for (name, result) in results.items():
+        files_per_second = result["files_per_second"]
+        print(
+            "%-14s %10.3f %10s %12.0f %9d KiB"
+            % (
+                name,
+                result["seconds"],
+                "-" if files_per_second is None else "%.0f" % files_per_second,
+                result["messages_per_second"],
+                result["peak_rss_kb"],
+            )
+        )
+
+
+def compare_results(baseline, results, threshold):
+    """Print the change relative to a baseline, and return the regressions."""
+    regressions = []
+    print()
+    print(
+        "%-14s %12s %12s %8s %10s"
+        % ("benchmark", "baseline", "current", "change", "RSS change")
+    )
+    for (name, result) in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]["messages_per_second"]
+        new = result["messages_per_second"]
+        change = (new - old) / old * 100
+        rss_change = (
+            (result["peak_rss_kb"] - baseline[name]["peak_rss_kb"])
+            / baseline[name]["peak_rss_kb"]
+            * 100
+        )
+        marker = ""
+        if change < -threshold:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print(
+            "%-14s %12.0f %12.0f %+7.1f%% %+9.1f%%%s"
+            % (name, old, new, change, rss_change, marker)
+        )
+    return regressions
+
+
+@click.command()
+@click.option("--files", default=100, show_default=True, help="Files of each kind")
+@click.option(
+    "--messages", default=20, show_default=True, help="Messages in every file"
+)
+@click.option(
+    "--filler",
+    default=5,
+    show_default=True,
+    help="Lines without messages after every message",
+)
+@click.option(
+    "--jobs", default=1, show_default=True, help="Processes used by pot-create"
+)
+@click.option(
+    "--repeat",
+    default=3,
+    show_default=True,
+    help="Run every benchmark this many times and report the fastest run",
+)
+@click.option(
+    "--corpus",
+    "directory",
+    metavar="DIRECTORY",
+    help="Generate the corpus in DIRECTORY instead of a temporary directory",
+)
+@click.option(
+    "--save", metavar="FILE", type=click.File("w"), help="Store results as baseline"
+)
+@click.option(
+    "--compare",
+    metavar="FILE",
+    type=click.File("r"),
+    help="Compare results with a baseline",
+)
+@click.option(
+    "--threshold",
+    default=10.0,
+    show_default=True,
+    help="Percentage throughput drop reported as regression",
+)
+def main(files, messages, filler, jobs, repeat, directory, save, compare, threshold):
+    cleanup = directory is None
+    if cleanup:
+        directory = tempfile.mkdtemp(prefix="lingua-benchmark-")
+    try:
+        results = run_benchmarks(directory, files, messages, filler, jobs, repeat)
+    finally:
+        if cleanup:
+            shutil.rmtree(directory)
+    print_results(results)
+    if save is not None:
+        json.dump(
+            OrderedDict(
+                [
+                    ("version", 1),
+                    ("lingua", __version__),
+                    ("python", platform.python_version()),
+                    ("settings", [files, messages, filler, jobs]),
+                    ("results", results),
+                ]
+            ),
+            save,
+            indent=2,
+        )
+        save.write("\n")
+    if compare is not None:
+        baseline = json.load(compare)
+        if baseline.get("settings") != [files, messages, filler, jobs]:
+            click.echo(
+                "Warning: baseline was created with different settings", err=True
+            )
+        if compare_results(baseline["results"], results, threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+import hashlib
+import io
+import json
+import os
+import tempfile
+from lingua.extractors import Message
+from lingua import __version__
+
+
+class ExtractionCache(object):
+    """On-disk cache of the messages extracted from each file.
+
+    Cached messages are only used if the contents of the file are unchanged,
+    and the same extractor, extractor configuration and extraction options
+    are used. Files are only read to compare their contents if their size
+    or modification time changed, so a fresh checkout of unchanged files
+    still uses the cache.
+    """
+
+    version = 4
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = {}
+        # Digests of files which missed the cache, taken before extraction.
+        self._digests = {}
+        self.expressions = []
+        self.hits = 0
+        self.misses = 0
+        try:
+            with io.open(filename, "rt", encoding="utf-8") as input:
+                data = json.load(input)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == self.version:
+            self.entries = data.get("files", {})
+            self.expressions = data.get("expressions", [])
+
+    @staticmethod
+    def _settings(extractor, options):
+        cls = type(extractor)
+        settings = [
+            __version__,
+            "%s.%s" % (cls.__module__, cls.__name__),
+            sorted((str(k), str(v)) for (k, v) in extractor.config.items()),
+            options.comment_tag,
+            options.domain,
+            list(options.keywords),
+        ]
+        return hashlib.sha1(repr(settings).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _digest(filename):
+        digest = hashlib.sha1()
+        with io.open(filename, "rb") as input:
+            for block in iter(lambda: input.read(65536), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def key(self, filename, extractor, options):
+        st = os.stat(filename)
+        return (
+            filename,
+            self._settings(extractor, options),
+            [st.st_size, st.st_mtime_ns],
+        )
+
+    def _unchanged(self, entry, key):
+        (filename, signature, stat) = key
+        if entry is None or entry["signature"] != signature:
+            return False
+        if entry["stat"] == stat:
+            return True
+        if entry["stat"][0] != stat[0]:
+            return False
+        digest = self._digest(filename)
+        if entry["sha1"] != digest:
+            self._digests[filename] = digest
+            return False
+        entry["stat"] = stat
+        return True
+
+    def get(self, key):
+        filename = key[0]
+        entry = self.entries.get(filename)
+        if not self._unchanged(entry, key):
+            if filename not in self._digests:
+                self._digests[filename] = self._digest(filename)
+            self.misses += 1
+            return None
+        self.hits += 1
+        messages = []
+        for fields in entry["messages"]:
+            message = Message(*fields)
+            messages.append(message._replace(location=tuple(message.location)))
+        return messages
+
+    def set(self, key, messages):
+        (filename, signature, stat) = key
+        digest = self._digests.pop(filename, None)
+        if digest is None:
+            digest = self._digest(filename)
+        self.entries[filename] = {
+            "signature": signature,
+            "stat": stat,
+            "sha1": digest,
+            "messages": [list(message) for message in messages],
+        }
+
+    def save(self):
+        entries = dict(
+            (filename, entry)
+            for (filename, entry) in self.entries.items()
+            if os.path.exists(filename)
+        )
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        (fd, tmpfile) = tempfile.mkstemp(dir=directory, text=True)
+        with io.open(fd, "wt", encoding="utf-8") as output:
+            json.dump(
+                {
+                    "version": self.version,
+                    "files": entries,
+                    "expressions": self.expressions,
+                },
+                output,
+            )
+        os.replace(tmpfile, self.filename)
+
+
+class ExpressionCache(object):
+    """Least recently used cache of the messages found in Python expressions.
+
+    Templates often use the same expressions, so the messages found in an
+    expression are remembered for every set of extraction options. Message
+    line numbers are relative to the start of the expression. The entries
+    can be stored in an :py:class:`ExtractionCache` to reuse them in a later
+    run.
+
+    If ``added`` is a list, new entries are also appended to it. Worker
+    processes use this to report their entries back.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.added = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def signature(options):
+        settings = [
+            __version__,
+            options.comment_tag,
+            options.domain,
+            list(options.keywords),
+        ]
+        return hashlib.sha1(repr(settings).encode("utf-8")).hexdigest()
+
+    def get(self, signature, source):
+        key = (signature, source)
+        messages = self.entries.get(key)
+        if messages is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return messages
+
+    def set(self, signature, source, messages):
+        if self.added is not None:
+            self.added.append((signature, source, messages))
+        self._store(signature, source, messages)
+
+    def _store(self, signature, source, messages):
+        key = (signature, source)
+        self.entries[key] = messages
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    @staticmethod
+    def _dump(entries):
+        return [
+            [signature, source, [list(message) for message in messages]]
+            for (signature, source, messages) in entries
+        ]
+
+    def dump(self):
+        """Return all entries, from least to most recently used."""
+        return self._dump(
+            (signature, source, messages)
+            for ((signature, source), messages) in self.entries.items()
+        )
+
+    def take_added(self):
+        """Return the entries added since the last call, in the same format
+        as :py:meth:`dump`."""
+        (added, self.added) = (self.added, [])
+        return self._dump(added)
+
+    def load(self, entries):
+        for (signature, source, messages) in entries:
+            self._store(
+                signature,
+                source,
+                [
+                    message._replace(location=tuple(message.location))
+                    for message in (Message(*fields) for fields in messages)
+                ],
+            )
+
+
+expression_cache = ExpressionCache()
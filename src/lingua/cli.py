@@ -0,0 +1,16 @@
+import os
+import click
+
+
+def parse_jobs(ctx, param, value):
+    """Parse the value of a ``--jobs`` option: a positive number, or
+    ``auto`` to use one process per CPU."""
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        raise click.BadParameter("must be a positive number or 'auto'")
+    return jobs
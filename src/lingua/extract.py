@@ -4,27 +4,41 @@ try:
     from collections import OrderedDict
 except ImportError:
     from ordereddict import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+import collections
+import copy
+import functools
+import hashlib
+import itertools
+import json
 from operator import attrgetter
 import os
 import re
 import sys
 import tempfile
 import time
-
-try:
-    from configparser import SafeConfigParser
-except ImportError:
-    try:
-        from configparser import ConfigParser as SafeConfigParser
-    except ImportError:
-        from ConfigParser import SafeConfigParser
+from configparser import ConfigParser
 import click
 import polib
+from lingua.cli import parse_jobs
+from lingua.cache import ExtractionCache
+from lingua.cache import expression_cache
+from lingua.stats import ExtractionStats
+from lingua.extractors import ExtractionError
+from lingua.extractors import NO_DOMAIN
 from lingua.extractors import get_extractor
+from lingua.extractors import get_extractor_name
+from lingua.watch import snapshot
+from lingua.watch import watch_files
+from lingua.walk import DEFAULT_EXCLUDES
+from lingua.walk import IgnoreRules
+from lingua.walk import Walker
 from lingua.extractors import register_extractors
 from lingua.extractors.babel import register_babel_plugins
 from lingua.extractors import EXTRACTORS
 from lingua.extractors import EXTENSIONS
+from lingua.extractors import PATHS
 from lingua import __version__
 
 
@@ -112,23 +126,36 @@ def no_duplicates(iterator):
         yield item
 
 
-def list_files(files_from, sources):
+def _list_files(files_from, sources, excludes=None, walker=None):
+    """Generate ``(filename, extractor)`` tuples for the files to scan. The
+    extractor name is only known for files found in a directory, and None
+    for other files."""
     if files_from:
         for filename in files_from:
             if filename.startswith("#") or not filename.strip():
                 continue
-            yield filename.rstrip()
+            yield (filename.rstrip(), None)
+    if walker is None:
+        walker = Walker(excludes)
+    else:
+        walker.reset()
     for file in sources:
         if os.path.isfile(file):
-            yield file
+            yield (file, None)
         elif os.path.isdir(file):
-            for (dirpath, dirnames, filenames) in os.walk(file):
-                for file in filenames:
-                    if get_extractor(file) is not None:
-                        yield os.path.join(dirpath, file)
+            for file in walker.walk(file):
+                extractor = get_extractor_name(file)
+                if extractor is not None:
+                    yield (file, extractor)
         else:
-            click.echo("Invalid file type for %s" % file, err=True)
-            sys.exit(1)
+            raise ExtractionError("Invalid file type for %s" % file)
+
+
+def list_files(files_from, sources, excludes=None, walker=None):
+    """Generate the files to scan. A :py:class:`Walker` can be passed in to
+    reuse the directory listings of an earlier call."""
+    for (filename, extractor) in _list_files(files_from, sources, excludes, walker):
+        yield filename
 
 
 def find_file(filename, search_path=[]):
@@ -177,34 +204,49 @@ def create_catalog(
     return catalog
 
 
-def _register_extension(extension, extractor):
-    if extractor not in EXTRACTORS:
-        click.echo(
+def _check_extractor(extractor):
+    # This loads the extractor, since a loader returns None if the extractor
+    # is not available.
+    try:
+        EXTRACTORS[extractor]
+    except KeyError:
+        raise ExtractionError(
             "Unknown extractor %s. Check --list-extractors for available options"
-            % extractor,
-            err=True,
+            % extractor
         )
-        sys.exit(1)
+
+
+def _register_extension(extension, extractor):
+    _check_extractor(extractor)
     EXTENSIONS[extension] = extractor
 
 
+def _register_path(pattern, extractor):
+    if extractor.lower() in ("", "none"):
+        extractor = ""
+    else:
+        _check_extractor(extractor)
+    PATHS.add(pattern, extractor)
+
+
 def read_config(cfg_file):
-    config = SafeConfigParser()
-    config.readfp(cfg_file)
+    config = ConfigParser()
+    # Path patterns are case sensitive, so do not lowercase option names.
+    config.optionxform = str
+    config.read_file(cfg_file)
     for section in config.sections():
         if section == "extensions":
             for (extension, extractor) in config.items(section):
-                _register_extension(extension, extractor)
+                _register_extension(extension.lower(), extractor)
+        elif section == "paths":
+            for (pattern, extractor) in config.items(section):
+                _register_path(pattern, extractor)
         elif section.startswith("extractor:"):
             extractor = section[10:]
-            if extractor not in EXTRACTORS:
-                click.echo(
-                    "Unknown extractor %s. "
-                    "Check --list-extractors for available options" % extractor,
-                    err=True,
-                )
-                sys.exit(1)
-            extractor_config = dict(config.items(section))
+            _check_extractor(extractor)
+            extractor_config = dict(
+                (key.lower(), value) for (key, value) in config.items(section)
+            )
             EXTRACTORS[extractor].update_config(**extractor_config)
         elif section.startswith("extension"):
             click.echo(
@@ -235,27 +277,399 @@ def identical(a, b):
     return a == b
 
 
+def _catalog_entries(catalog):
+    """Generate the entries of a catalog in the order they are written."""
+    return itertools.chain(
+        (entry for entry in catalog if not entry.obsolete),
+        catalog.obsolete_entries(),
+    )
+
+
+def write_catalog(catalog, output, fingerprint=None):
+    """Write a catalog to a file.
+
+    This produces the same output as ``polib.POFile.__unicode__``, but
+    writes every entry as soon as it has been formatted instead of building
+    the entire file in memory first. If a ``fingerprint`` digest from
+    :py:func:`new_fingerprint` is given every entry is added to it as it is
+    written.
+    """
+    for line in catalog.header.split("\n"):
+        if not line:
+            output.write("#\n")
+        elif line[:1] in [",", ":"]:
+            output.write("#%s\n" % line)
+        else:
+            output.write("# %s\n" % line)
+    output.write(catalog.metadata_as_entry().__unicode__(catalog.wrapwidth))
+    for entry in _catalog_entries(catalog):
+        output.write("\n")
+        output.write(entry.__unicode__(catalog.wrapwidth))
+        if fingerprint is not None:
+            update_fingerprint(fingerprint, entry)
+
+
+FINGERPRINT_HEADER = "lingua-fingerprint: "
+
+
+def new_fingerprint(catalog):
+    """Return a digest of the settings and metadata of a catalog, ignoring
+    its creation date. Entries are added with :py:func:`update_fingerprint`."""
+    digest = hashlib.sha1()
+    metadata = [
+        (key, value)
+        for (key, value) in catalog.metadata.items()
+        if key != "POT-Creation-Date"
+    ]
+    header = [catalog.wrapwidth, getattr(catalog, "copyright_holder", None), metadata]
+    digest.update(repr(header).encode("utf-8"))
+    return digest
+
+
+def update_fingerprint(digest, entry):
+    fields = (
+        entry.msgctxt,
+        entry.msgid,
+        entry.msgid_plural,
+        entry.occurrences,
+        entry.flags,
+        entry.comment,
+        entry.tcomment,
+        entry.obsolete,
+    )
+    digest.update(repr(fields).encode("utf-8"))
+
+
+def catalog_fingerprint(catalog):
+    """Return a fingerprint of a catalog, ignoring its creation date."""
+    digest = new_fingerprint(catalog)
+    for entry in _catalog_entries(catalog):
+        update_fingerprint(digest, entry)
+    return digest.hexdigest()
+
+
+def read_fingerprint(filename):
+    """Return the fingerprint stored in the header of a POT file."""
+    prefix = "# " + FINGERPRINT_HEADER
+    try:
+        with io.open(filename, "rt", encoding="utf-8") as input:
+            for line in input:
+                if line.startswith(prefix):
+                    return line[len(prefix) :].strip()
+                if not line.startswith("#"):
+                    break
+    except (OSError, UnicodeDecodeError):
+        pass
+    return None
+
+
+def _unchanged(filename, fingerprint, tmpfile):
+    old_fingerprint = read_fingerprint(filename)
+    if old_fingerprint is not None:
+        return old_fingerprint == fingerprint
+    # Files created by older lingua versions have no fingerprint.
+    try:
+        return identical(polib.pofile(tmpfile), polib.pofile(filename))
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
 def save_catalog(catalog, filename):
-    if os.path.exists(filename):
-        old_catalog = None
-        try:
-            old_catalog = polib.pofile(filename)
-        except (OSError, UnicodeDecodeError):
-            pass
-        if old_catalog is not None and identical(catalog, old_catalog):
+    """Save a catalog, unless the file already has the same contents.
+
+    The entries of the catalog are generated only once: the catalog is
+    written to a temporary file while its fingerprint is calculated, and
+    the fingerprint is filled in afterwards.
+    """
+    digest = new_fingerprint(catalog)
+    placeholder = "0" * (2 * digest.digest_size)
+    catalog.header = FINGERPRINT_HEADER + placeholder
+    (fd, tmpfile) = tempfile.mkstemp(dir=os.path.dirname(filename), text=True)
+    try:
+        with io.open(fd, "w+t", encoding=catalog.encoding) as output:
+            write_catalog(catalog, output, digest)
+            fingerprint = digest.hexdigest()
+            # The header line has the same length as the placeholder line.
+            output.seek(0)
+            output.write("# %s%s" % (FINGERPRINT_HEADER, fingerprint))
+        catalog.header = FINGERPRINT_HEADER + fingerprint
+        if os.path.exists(filename) and _unchanged(filename, fingerprint, tmpfile):
             click.echo("No changes found - not replacing %s" % filename)
+            os.unlink(tmpfile)
             return
-    (fd, tmpfile) = tempfile.mkstemp(dir=os.path.dirname(filename), text=True)
-    output = io.open(fd, "wt", encoding=catalog.encoding)
-    output.write(catalog.__unicode__())
-    output.close()
-    os.rename(tmpfile, filename)
+        os.rename(tmpfile, filename)
+    except BaseException:
+        if os.path.exists(tmpfile):
+            os.unlink(tmpfile)
+        raise
+
+
+def _add_unique(values, value):
+    # A dictionary is used as an insertion ordered set, but only for entries
+    # with more than one distinct value.
+    if values is None:
+        return value
+    if isinstance(values, dict):
+        values.setdefault(value, None)
+        return values
+    if values == value:
+        return values
+    return {values: None, value: None}
+
+
+def _as_list(values):
+    if values is None:
+        return []
+    if isinstance(values, dict):
+        return list(values)
+    return [values]
+
+
+class CompactEntry(object):
+    """Memory efficient storage for a catalog entry.
+
+    Comments and flags are stored as a single string unless an entry has
+    several distinct values, and locations are stored in a single flat list of
+    (shared) file names and integer line numbers. ``omitted`` is the number of
+    locations which were not stored because the entry already had the
+    maximum number of locations.
+    """
+
+    __slots__ = (
+        "msgctxt",
+        "msgid",
+        "msgid_plural",
+        "flags",
+        "comments",
+        "tcomments",
+        "locations",
+        "omitted",
+    )
+
+    def __init__(self, msgctxt, msgid, msgid_plural=None):
+        self.msgctxt = msgctxt
+        self.msgid = msgid
+        self.msgid_plural = msgid_plural
+        self.flags = None
+        self.comments = None
+        self.tcomments = None
+        self.locations = []
+        self.omitted = 0
+
+    def update(self, message):
+        for flag in message.flags:
+            self.flags = _add_unique(self.flags, flag)
+        self.comments = _add_unique(self.comments, message.comment)
+        self.tcomments = _add_unique(self.tcomments, message.tcomment)
+
+    def add_location(self, path, line, max_locations=None):
+        if max_locations is not None and len(self.locations) >= 2 * max_locations:
+            self.omitted += 1
+        else:
+            self.locations.append(path)
+            self.locations.append(line)
 
+    def occurrences(self):
+        """Generate the ``(filename, line)`` tuples for all locations."""
+        locations = iter(self.locations)
+        return zip(locations, locations)
 
-def _location_sort_key(msg):
-    locations = [(fn, int(line)) for (fn, line) in msg.occurrences]
-    locations.sort()  # Sort so first occurence is always used.
-    return locations
+    def location_sort_key(self):
+        return sorted(self.occurrences())
+
+    def poentry(self, linenumbers=True, count_locations=False):
+        """Return this entry as a :py:class:`POEntry`."""
+        entry = POEntry(msgctxt=self.msgctxt, msgid=self.msgid)
+        if self.msgid_plural:
+            entry.msgid_plural = self.msgid_plural
+            entry.msgstr_plural[0] = ""
+            entry.msgstr_plural[1] = ""
+        entry.flags = _as_list(self.flags)
+        entry._comments = _as_list(self.comments)
+        entry._tcomments = _as_list(self.tcomments)
+        if count_locations and self.omitted:
+            entry._comments = [comment for comment in entry._comments if comment]
+            entry._comments.append(
+                "%d more location%s not listed"
+                % (self.omitted, "" if self.omitted == 1 else "s")
+            )
+        if linenumbers:
+            entry.occurrences = [
+                (path, str(line)) for (path, line) in self.occurrences()
+            ]
+        else:
+            entry.occurrences = [
+                (path, "") for path in no_duplicates(self.locations[::2])
+            ]
+        return entry
+
+
+class CompactCatalog(object):
+    """A catalog which stores its entries as :py:class:`CompactEntry` objects.
+
+    This uses much less memory than a :py:class:`POFile` for large catalogs.
+    Iterating over the catalog generates a :py:class:`POEntry` for each
+    entry, so it can be passed to :py:func:`save_catalog` and
+    :py:func:`write_catalog`. Other attributes, such as the metadata, are
+    taken from the (empty) ``pofile``.
+
+    If ``linenumbers`` is false a file is only listed once in the locations
+    of an entry. ``max_locations`` limits the number of locations stored for
+    every entry; if ``count_locations`` is set a comment with the number of
+    locations which were left out is added to entries which hit the limit.
+    """
+
+    def __init__(
+        self,
+        pofile,
+        add_occurrences=True,
+        linenumbers=True,
+        max_locations=None,
+        count_locations=False,
+    ):
+        self.pofile = pofile
+        self.add_occurrences = add_occurrences
+        self.linenumbers = linenumbers
+        self.max_locations = max_locations
+        self.count_locations = count_locations
+        self.entries = []
+        self._index = {}
+        self._paths = {}
+        # Messages are merged one file at a time, so to find duplicate
+        # locations without line numbers we only need to remember which
+        # entries were seen for the current file.
+        self._current_path = None
+        self._current_entries = set()
+
+    def __getattr__(self, name):
+        return getattr(self.pofile, name)
+
+    @property
+    def header(self):
+        return self.pofile.header
+
+    @header.setter
+    def header(self, value):
+        self.pofile.header = value
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        for entry in self.entries:
+            yield entry.poentry(self.linenumbers, self.count_locations)
+
+    def obsolete_entries(self):
+        return []
+
+    def merge(self, messages):
+        """Merge extracted messages into the catalog."""
+        for message in messages:
+            # Avoid creating a tuple for every message without a context.
+            if message.msgctxt is None:
+                key = message.msgid
+            else:
+                key = (message.msgctxt, message.msgid)
+            entry = self._index.get(key)
+            if entry is None:
+                entry = self._index[key] = CompactEntry(
+                    message.msgctxt, message.msgid, message.msgid_plural
+                )
+                self.entries.append(entry)
+            entry.update(message)
+            if self.add_occurrences:
+                self._add_location(entry, key, message.location)
+
+    def _add_location(self, entry, key, location):
+        path = self._paths.setdefault(location[0], location[0])
+        if not self.linenumbers:
+            if path is not self._current_path:
+                self._current_path = path
+                self._current_entries = set()
+            elif key in self._current_entries:
+                return
+            self._current_entries.add(key)
+        entry.add_location(path, int(location[1]), self.max_locations)
+
+    def finish(self, sort_order):
+        """Sort the catalog."""
+        if sort_order == "msgid":
+            self.entries.sort(key=attrgetter("msgid"))
+        elif sort_order == "location":
+            self.entries.sort(key=CompactEntry.location_sort_key)
+
+    def to_pofile(self):
+        """Return a :py:class:`POFile` with all entries."""
+        catalog = copy.copy(self.pofile)
+        del catalog[:]
+        for entry in self:
+            catalog.append(entry)
+        return catalog
+
+
+class DomainCatalogs(object):
+    """Merge extracted messages into catalogs.
+
+    If ``split_domains`` is set a separate catalog is created for every
+    domain found in the messages. The catalog for a domain contains the same
+    messages as extracting only that domain: messages without a domain are
+    added to the catalogs for all domains, and messages with
+    :py:data:`NO_DOMAIN` are left out. Otherwise all messages are added to a
+    single catalog, which uses None as its domain. Extra keyword arguments are
+    passed to :py:class:`CompactCatalog`.
+    """
+
+    def __init__(
+        self, new_catalog, add_occurrences=True, split_domains=False, **options
+    ):
+        self.new_catalog = functools.partial(
+            _new_compact_catalog, new_catalog, add_occurrences, options
+        )
+        self.split_domains = split_domains
+        self.catalogs = OrderedDict()
+        self.common = []
+        if not split_domains:
+            self.catalogs[None] = self.new_catalog()
+
+    def _add_domain(self, domain):
+        if domain in (".", "..") or "/" in domain or os.sep in domain:
+            raise ExtractionError("Invalid domain name: %s" % domain)
+        catalog = self.catalogs[domain] = self.new_catalog()
+        catalog.merge(self.common)
+        return catalog
+
+    def add(self, messages):
+        if not self.split_domains:
+            self.catalogs[None].merge(messages)
+            return
+        for message in messages:
+            if message.domain is None:
+                self.common.append(message)
+                catalogs = list(self.catalogs.values())
+            elif message.domain == NO_DOMAIN:
+                continue
+            else:
+                catalog = self.catalogs.get(message.domain)
+                if catalog is None:
+                    catalog = self._add_domain(message.domain)
+                catalogs = [catalog]
+            for catalog in catalogs:
+                catalog.merge([message])
+
+    def items(self):
+        return self.catalogs.items()
+
+    def no_domain(self):
+        """Check if messages were found, but none of them had a domain to
+        create a catalog for."""
+        return self.split_domains and bool(self.common) and not self.catalogs
+
+    def __bool__(self):
+        return any(self.catalogs.values())
+
+
+def _new_compact_catalog(new_catalog, add_occurrences, options):
+    return CompactCatalog(new_catalog(), add_occurrences, **options)
 
 
 class ExtractorOptions:
@@ -264,6 +678,380 @@ class ExtractorOptions:
         self.domain = domain
         self.keywords = keywords
 
+    @property
+    def keyword_registry(self):
+        """The keywords extractors should look for. The registry is only
+        built once for every set of keyword specifications."""
+        from lingua.extractors.python import keyword_registry
+
+        return keyword_registry(tuple(self.keywords))
+
+
+def load_config(cfg_file):
+    """Read the given configuration file, or the global configuration."""
+    if cfg_file:
+        read_config(cfg_file)
+    else:
+        user_home = os.path.expanduser("~")
+        global_config = os.path.join(user_home, ".config", "lingua")
+        if os.path.exists(global_config):
+            read_config(open(global_config, "r"))
+
+
+def find_sources(
+    files_from, sources, directory, missing_ok=False, excludes=None, walker=None
+):
+    """Generate a ``(filename, extractor)`` tuple for every file that needs
+    to be scanned, with the name of the extractor to use for it. The
+    extractor is only looked up once for every file."""
+    seen = set()
+    for (filename, extractor) in _list_files(files_from, sources, excludes, walker):
+        if filename in seen:
+            continue
+        seen.add(filename)
+        real_filename = find_file(filename, directory)
+        if real_filename is None:
+            if missing_ok:
+                continue
+            raise ExtractionError("Can not find file %s" % filename)
+        if extractor is None:
+            extractor = get_extractor_name(real_filename)
+            if extractor is None:
+                raise ExtractionError("No extractor available for file %s" % filename)
+        yield (real_filename, extractor)
+
+
+def _extract_file(filename, extractor, options):
+    """Extract all messages from a single file. This returns the messages,
+    and whether the file was skipped because the extractor found it can not
+    contain messages."""
+    extractor = EXTRACTORS[extractor]
+    if not extractor.may_contain_messages(filename, options):
+        return ([], True)
+    return (list(extractor(filename, options)), False)
+
+
+def extract_file(filename, options):
+    """Extract all messages from a single file."""
+    extractor = get_extractor_name(filename)
+    if extractor is None:
+        raise ExtractionError("No extractor available for file %s" % filename)
+    return _extract_file(filename, extractor, options)[0]
+
+
+def _extract_file_timed(filename, extractor, options):
+    start = time.perf_counter()
+    (messages, skipped) = _extract_file(filename, extractor, options)
+    return (messages, time.perf_counter() - start, skipped)
+
+
+def _extract_file_worker(filename, extractor, options):
+    """Extract messages in a worker process. This also returns the expression
+    cache entries added while doing so, and the number of cache hits and
+    misses."""
+    (hits, misses) = (expression_cache.hits, expression_cache.misses)
+    result = _extract_file_timed(filename, extractor, options)
+    expressions = (
+        expression_cache.take_added(),
+        expression_cache.hits - hits,
+        expression_cache.misses - misses,
+    )
+    return result + (expressions,)
+
+
+def _config_state():
+    """Return the extractor configuration of this process, so worker
+    processes can use the same configuration."""
+    configs = dict(
+        (name, dict(extractor.config))
+        for (name, extractor) in EXTRACTORS.loaded()
+        if extractor.config != extractor.default_config
+    )
+    return (configs, dict(EXTENSIONS), list(PATHS.routes))
+
+
+def _init_worker(config_source, state=None, expressions=()):
+    register_extractors()
+    register_babel_plugins()
+    expression_cache.load(expressions)
+    expression_cache.added = []
+    if config_source is not None:
+        read_config(io.StringIO(config_source))
+        return
+    (configs, extensions, routes) = state
+    EXTENSIONS.clear()
+    EXTENSIONS.update(extensions)
+    PATHS.clear()
+    for (pattern, extractor) in routes:
+        PATHS.add(pattern, extractor)
+    for (name, config) in configs.items():
+        EXTRACTORS[name].update_config(**config)
+
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def extract_files(sources, options, jobs=1, config_source=None, cache=None, stats=None):
+    """Extract messages from files, optionally using a pool of worker processes.
+
+    ``sources`` are ``(filename, extractor)`` tuples, as generated by
+    :py:func:`find_sources`. This generates a ``(filename, messages)`` tuple
+    for each file, in the same order as the input files. Only a limited number of files is queued at a time, so
+    this also works for very long inputs. If an :py:class:`ExtractionStats`
+    instance is given the time needed to extract every file is recorded.
+
+    Worker processes read ``config_source``, the contents of a configuration
+    file, if it is given. Otherwise they use the extractor configuration of
+    this process. Workers start with the entries of the expression cache of
+    this process, and the entries they add are merged back into it.
+    """
+    if jobs > 1:
+        # Workers read the same configuration file, or copy the configuration
+        # of this process.
+        state = _config_state() if config_source is None else None
+        executor = ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(config_source, state, expression_cache.dump()),
+        )
+        window = jobs * 4
+    else:
+        executor = None
+        window = 1
+    pending = collections.deque()
+    try:
+        for (filename, extractor) in sources:
+            key = None
+            messages = None
+            if cache is not None:
+                key = cache.key(filename, EXTRACTORS[extractor], options)
+                messages = cache.get(key)
+            if messages is not None:
+                future = _done((messages, None, False, None))
+                key = None
+            elif executor is not None:
+                future = executor.submit(
+                    _extract_file_worker, filename, extractor, options
+                )
+            else:
+                result = _extract_file_timed(filename, extractor, options)
+                future = _done(result + (None,))
+            pending.append((filename, extractor, key, future))
+            while len(pending) >= window:
+                yield _finish(pending.popleft(), cache, stats)
+        while pending:
+            yield _finish(pending.popleft(), cache, stats)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _finish(item, cache, stats):
+    (filename, extractor, key, future) = item
+    (messages, elapsed, skipped, expressions) = future.result()
+    if expressions is not None:
+        (entries, hits, misses) = expressions
+        expression_cache.load(entries)
+        expression_cache.hits += hits
+        expression_cache.misses += misses
+    if key is not None:
+        cache.set(key, messages)
+    if stats is not None:
+        stats.add_file(
+            filename,
+            type(EXTRACTORS[extractor]).__name__,
+            elapsed or 0.0,
+            len(messages),
+            cached=elapsed is None,
+            skipped=skipped,
+        )
+    return (filename, messages)
+
+
+def message_record(message):
+    """Return a message as a dictionary which can be serialised to JSON."""
+    record = message._asdict()
+    record["flags"] = list(message.flags)
+    record["location"] = list(message.location)
+    return record
+
+
+def write_messages(messages, output):
+    """Write messages to a file, using one line of JSON for each message."""
+    for message in messages:
+        output.write(json.dumps(message_record(message), ensure_ascii=False))
+        output.write("\n")
+
+
+def stream_messages(results, output, stats=None):
+    """Write the messages from :py:func:`extract_files` to a file as soon as
+    they are extracted, using one line of JSON for every message.
+
+    This returns the number of files and messages processed.
+    """
+    files = 0
+    messages = 0
+    if stats is not None:
+        results = stats.timed("extract", results)
+    for (filename, file_messages) in results:
+        write_messages(file_messages, output)
+        # Make the messages available to a reading process immediately.
+        output.flush()
+        files += 1
+        messages += len(file_messages)
+    return (files, messages)
+
+
+def save_catalogs(catalogs, output, sort_order, create_directory=False):
+    """Save all catalogs.
+
+    For catalogs with a domain ``{domain}`` in the output filename is
+    replaced with the domain name, and the directory of the output file is
+    created if needed. Set ``create_directory`` to also create it for a
+    catalog without a domain. If the output filename is ``-`` the catalog is
+    written to stdout.
+    """
+    for (domain, catalog) in catalogs.items():
+        catalog.finish(sort_order)
+        if output == "-":
+            with click.open_file(output, "w", encoding="utf-8") as fileobj:
+                write_catalog(catalog, fileobj)
+            continue
+        if domain is None:
+            filename = output
+        else:
+            filename = output.replace("{domain}", domain)
+        if domain is not None or create_directory:
+            directory = os.path.dirname(filename)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+        save_catalog(catalog, filename)
+
+
+def _ensure_extractors():
+    if not EXTRACTORS:
+        register_extractors()
+        register_babel_plugins()
+
+
+def extract_messages(
+    sources, options, files_from=None, directory=(), jobs=1, cache=None, excludes=None
+):
+    """Generate all messages found in the given files and directories.
+
+    ``excludes`` can be an :py:class:`IgnoreRules` instance with patterns for
+    files and directories to skip. This raises an :py:class:`ExtractionError`
+    if a file can not be found or parsed.
+    """
+    _ensure_extractors()
+    sources = find_sources(files_from, sources, list(directory), excludes=excludes)
+    for (filename, messages) in extract_files(sources, options, jobs, cache=cache):
+        for message in messages:
+            yield message
+
+
+def extract(
+    sources,
+    options,
+    files_from=None,
+    directory=(),
+    location=True,
+    linenumbers=True,
+    sort_order=None,
+    width=79,
+    copyright_holder=None,
+    package_name="PACKAGE",
+    package_version="1.0",
+    msgid_bugs_address=None,
+    jobs=1,
+    cache=None,
+    excludes=None,
+    max_locations=None,
+    count_locations=False,
+):
+    """Extract all messages from the given files and directories.
+
+    This returns a catalog with all messages, using the same arguments as
+    the ``pot-create`` command line options. Use :py:func:`save_catalog` to
+    write the catalog to a POT file.
+    """
+    catalog = CompactCatalog(
+        create_catalog(
+            width, copyright_holder, package_name, package_version, msgid_bugs_address
+        ),
+        location,
+        linenumbers,
+        max_locations,
+        count_locations,
+    )
+    catalog.merge(
+        extract_messages(sources, options, files_from, directory, jobs, cache, excludes)
+    )
+    catalog.finish(sort_order)
+    return catalog.to_pofile()
+
+
+def extract_domains(
+    sources,
+    options,
+    files_from=None,
+    directory=(),
+    location=True,
+    linenumbers=True,
+    sort_order=None,
+    width=79,
+    copyright_holder=None,
+    package_name="PACKAGE",
+    package_version="1.0",
+    msgid_bugs_address=None,
+    jobs=1,
+    cache=None,
+    excludes=None,
+    max_locations=None,
+    count_locations=False,
+):
+    """Extract all messages from the given files and directories, and return
+    an ordered dictionary with a catalog for every domain.
+
+    Every catalog contains the same messages as extracting only its domain
+    with the ``domain`` option. Messages without a domain are only added to
+    the catalogs of the domains that were found, so if no message has a
+    domain the dictionary is empty.
+    """
+    new_catalog = functools.partial(
+        create_catalog,
+        width,
+        copyright_holder,
+        package_name,
+        package_version,
+        msgid_bugs_address,
+    )
+    catalogs = DomainCatalogs(
+        new_catalog,
+        location,
+        split_domains=True,
+        linenumbers=linenumbers,
+        max_locations=max_locations,
+        count_locations=count_locations,
+    )
+    catalogs.add(
+        extract_messages(sources, options, files_from, directory, jobs, cache, excludes)
+    )
+    result = OrderedDict()
+    for (domain, catalog) in catalogs.items():
+        catalog.finish(sort_order)
+        result[domain] = catalog.to_pofile()
+    return result
+
+
+NO_DOMAIN_ERROR = (
+    "Translatable strings were found, but none of them has a domain to create "
+    "a POT file for. Use --domain to select a domain."
+)
+
 
 @click.command()
 @click.option(
@@ -290,6 +1078,20 @@ class ExtractorOptions:
     multiple=True,
     help="Add DIRECTORY to list of paths to check for input files",
 )
+@click.option(
+    "-x",
+    "--exclude",
+    metavar="PATTERN",
+    multiple=True,
+    help="Skip files and directories matching PATTERN when scanning directories",
+)
+@click.option(
+    "--exclude-from",
+    metavar="FILE",
+    type=click.File(),
+    multiple=True,
+    help="Read patterns for files and directories to skip from FILE",
+)
 @click.argument("sources", nargs=-1, type=click.Path(exists=True))
 @click.option(
     "--list-extractors", is_flag=True, help="List all known extraction plugins"
@@ -299,9 +1101,17 @@ class ExtractorOptions:
     "-o",
     "--output",
     metavar="FILE",
-    type=click.Path(exists=False, dir_okay=False, writable=True),
-    default="messages.pot",
-    help="Filename for generated POT file",
+    type=click.Path(exists=False, dir_okay=False, writable=True, allow_dash=True),
+    help="Filename for generated POT file, or - for stdout. If this contains "
+    "{domain} a POT file is created for every domain. Defaults to messages.pot, "
+    "or stdout for --format=ndjson.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["pot", "ndjson"]),
+    default="pot",
+    help="Output format: a POT file, or one line of JSON for every message found",
 )
 @click.option(
     "--add-location/--no-location",
@@ -314,6 +1124,18 @@ class ExtractorOptions:
     default=True,
     help="Include line numbers in location information",
 )
+@click.option(
+    "--max-locations",
+    metavar="N",
+    type=click.IntRange(min=1),
+    help="Only list the first N locations of every message",
+)
+@click.option(
+    "--count-locations",
+    is_flag=True,
+    help="Add a comment with the number of locations not listed because of "
+    "--max-locations",
+)
 @click.option("-w", "--width", metavar="NUMBER", default=79, help="Output width")
 @click.option(
     "-s",
@@ -346,6 +1168,39 @@ class ExtractorOptions:
     metavar="TAG",
     help="Add comments prefixed by TAG to messages, or all if no tag is given",
 )
+@click.option(
+    "-j",
+    "--jobs",
+    metavar="N",
+    default="1",
+    callback=parse_jobs,
+    help="Number of processes to use for extraction, or 'auto' for one per CPU",
+)
+@click.option(
+    "--cache",
+    "cache_file",
+    metavar="FILE",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Cache extracted messages in FILE, and only rescan changed files",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and update the POT file when source files change",
+)
+@click.option("--stats", "show_stats", is_flag=True, help="Print timing statistics")
+@click.option(
+    "--stats-format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Format for the timing statistics",
+)
+@click.option(
+    "--stats-slowest",
+    metavar="N",
+    default=10,
+    help="Number of slowest files to list in the statistics",
+)
 # POT metadata
 @click.option(
     "--copyright-holder",
@@ -371,16 +1226,27 @@ def main(
     cfg_file,
     files_from,
     directory,
+    exclude,
+    exclude_from,
     sources,
     list_extractors,
     output,
+    output_format,
     location,
     linenumbers,
+    max_locations,
+    count_locations,
     width,
     sort_order,
     domain,
     keywords,
     comment_tag,
+    jobs,
+    cache_file,
+    watch,
+    show_stats,
+    stats_format,
+    stats_slowest,
     copyright_holder,
     package_name,
     package_version,
@@ -394,66 +1260,187 @@ def main(
     if comment_tag is None:
         comment_tag = True
     if list_extractors:
-        for extractor in sorted(EXTRACTORS):
-            click.echo("%-17s %s" % (extractor, EXTRACTORS[extractor].__doc__ or ""))
+        for name in sorted(EXTRACTORS):
+            extractor = EXTRACTORS.get(name)
+            if extractor is not None:
+                click.echo("%-17s %s" % (name, extractor.__doc__ or ""))
         return
 
-    if cfg_file:
-        read_config(cfg_file)
-    else:
-        user_home = os.path.expanduser("~")
-        global_config = os.path.join(user_home, ".config", "lingua")
-        if os.path.exists(global_config):
-            read_config(open(global_config, "r"))
-
-    catalog = create_catalog(
-        width, copyright_holder, package_name, package_version, msgid_bugs_address
+    new_catalog = functools.partial(
+        create_catalog,
+        width,
+        copyright_holder,
+        package_name,
+        package_version,
+        msgid_bugs_address,
     )
+    extractor_options = ExtractorOptions(
+        comment_tag=comment_tag,
+        domain=domain,
+        keywords=keywords,
+    )
+    if output is None:
+        output = "-" if output_format == "ndjson" else "messages.pot"
+    if output_format == "ndjson" and watch:
+        raise click.UsageError("--watch can not be used with --format=ndjson")
+    domain_template = split_domains = "{domain}" in output
+    if split_domains and output_format == "ndjson":
+        raise click.UsageError("{domain} can not be used with --format=ndjson")
+    if split_domains and domain:
+        output = output.replace("{domain}", domain)
+        split_domains = False
+    new_catalogs = functools.partial(
+        DomainCatalogs,
+        new_catalog,
+        location,
+        split_domains,
+        linenumbers=linenumbers,
+        max_locations=max_locations,
+        count_locations=count_locations,
+    )
+    stats = ExtractionStats(stats_slowest)
+    try:
+        with stats.phase("config"):
+            # Worker processes need to replay the configuration.
+            config_source = cfg_file.read() if cfg_file else None
+            if config_source is not None:
+                read_config(io.StringIO(config_source))
+            else:
+                load_config(None)
 
-    scanned = 0
-    for filename in no_duplicates(list_files(files_from, sources)):
-        real_filename = find_file(filename, directory)
-        if real_filename is None:
-            click.echo("Can not find file %s" % filename, err=True)
-            sys.exit(1)
-        extractor = get_extractor(real_filename)
-        if extractor is None:
-            click.echo("No extractor available for file %s" % filename, err=True)
-            sys.exit(1)
-
-        extractor_options = ExtractorOptions(
-            comment_tag=comment_tag,
-            domain=domain,
-            keywords=keywords,
+        cache = ExtractionCache(cache_file) if cache_file else None
+        if cache is not None:
+            expression_cache.load(cache.expressions)
+        excludes = IgnoreRules(DEFAULT_EXCLUDES + list(exclude))
+        for fileobj in exclude_from:
+            excludes.extend(IgnoreRules.from_file(fileobj))
+        walker = Walker(excludes)
+        found_sources = stats.timed(
+            "walk", find_sources(files_from, sources, directory, walker=walker)
         )
-        for message in extractor(real_filename, extractor_options):
-            entry = catalog.find(message.msgid, msgctxt=message.msgctxt)
-            if entry is None:
-                entry = POEntry(msgctxt=message.msgctxt, msgid=message.msgid)
-                if message.msgid_plural:
-                    entry.msgid_plural = message.msgid_plural
-                    entry.msgstr_plural[0] = ""
-                    entry.msgstr_plural[1] = ""
-                catalog.append(entry)
-            entry.update(message, add_occurrences=location)
-        scanned += 1
+        if output_format == "ndjson":
+            # Not atomic: messages must reach the output as they are found.
+            with click.open_file(output, "w", encoding="utf-8") as fileobj:
+                (scanned, found) = stream_messages(
+                    extract_files(
+                        found_sources,
+                        extractor_options,
+                        jobs,
+                        config_source,
+                        cache,
+                        stats,
+                    ),
+                    fileobj,
+                    stats,
+                )
+        else:
+            if watch:
+                # We need to be able to list all files again later.
+                files_from = list(files_from) if files_from else None
+                found_sources = list(found_sources)
+                extractors = dict(found_sources)
+                watched = snapshot(extractors)
+            file_messages = OrderedDict()
+
+            catalogs = new_catalogs()
+            scanned = 0
+            for (filename, messages) in stats.timed(
+                "extract",
+                extract_files(
+                    found_sources,
+                    extractor_options,
+                    jobs,
+                    config_source,
+                    cache,
+                    stats,
+                ),
+            ):
+                with stats.phase("merge"):
+                    catalogs.add(messages)
+                if watch:
+                    file_messages[filename] = messages
+                scanned += 1
+            found = bool(catalogs)
+    except ExtractionError as e:
+        click.echo(str(e), err=True)
+        sys.exit(1)
     if not scanned:
         click.echo("No files scanned, aborting", err=True)
         sys.exit(1)
-    if not catalog:
-        click.echo("No translatable strings found, aborting", err=True)
+    if not found:
+        if output_format == "pot" and catalogs.no_domain():
+            click.echo(NO_DOMAIN_ERROR, err=True)
+        else:
+            click.echo("No translatable strings found, aborting", err=True)
         sys.exit(2)
 
-    if sort_order == "msgid":
-        catalog.sort(key=attrgetter("msgid"))
-    elif sort_order == "location":
-        catalog.sort(key=_location_sort_key)
+    if output_format == "pot":
+        with stats.phase("save"):
+            save_catalogs(catalogs, output, sort_order, domain_template)
+        stats.entries = sum(len(catalog) for (domain, catalog) in catalogs.items())
+    stats.expression_hits = expression_cache.hits
+    stats.expression_misses = expression_cache.misses
+    if cache is not None:
+        with stats.phase("cache"):
+            cache.expressions = expression_cache.dump()
+            cache.save()
+    if show_stats:
+        if stats_format == "json":
+            click.echo(stats.format_json(), err=True)
+        else:
+            click.echo(stats.format_text(), err=True)
+    if not watch:
+        return
 
-    if not linenumbers:
-        for entry in catalog:
-            strip_linenumbers(entry)
+    def list_sources():
+        existing = [source for source in sources if os.path.exists(source)]
+        for (filename, extractor) in find_sources(
+            files_from, existing, directory, missing_ok=True, walker=walker
+        ):
+            extractors[filename] = extractor
+            yield filename
 
-    save_catalog(catalog, output)
+    click.echo("Watching for changes, press Control-C to stop", err=True)
+    try:
+        for (filenames, changed) in watch_files(list_sources, watched):
+            pending = collections.deque(changed)
+            while pending:
+                try:
+                    for (filename, messages) in extract_files(
+                        [(filename, extractors[filename]) for filename in pending],
+                        extractor_options,
+                        min(jobs, len(pending)),
+                        config_source,
+                        cache,
+                    ):
+                        file_messages[filename] = messages
+                        pending.popleft()
+                except ExtractionError as e:
+                    # Keep the old messages for a file which can not be parsed
+                    # and continue with the next file.
+                    click.echo(str(e), err=True)
+                    file_messages.setdefault(pending.popleft(), [])
+            if cache is not None:
+                cache.save()
+            for filename in set(file_messages) - set(filenames):
+                del file_messages[filename]
+            catalogs = new_catalogs()
+            try:
+                for filename in filenames:
+                    catalogs.add(file_messages[filename])
+            except ExtractionError as e:
+                click.echo(str(e), err=True)
+                continue
+            if catalogs.no_domain():
+                click.echo(NO_DOMAIN_ERROR, err=True)
+                continue
+            if not catalogs:
+                click.echo("No translatable strings found", err=True)
+                continue
+            click.echo("Rescanned %d files" % len(changed))
+            save_catalogs(catalogs, output, sort_order, domain_template)
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
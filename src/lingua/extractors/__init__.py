@@ -1,29 +1,130 @@
 from __future__ import print_function
 import abc
 import collections
+import functools
 import os
 import re
-import sys
+import types
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 from .compat import add_metaclass
+from .compat import entry_point_target
 from .compat import EntryPointLoadError
 from .compat import iter_entry_points
 from .compat import load_entry_point
+from lingua.walk import PathRoutes
 
 
 Message = collections.namedtuple(
-    "Message", "msgctxt msgid msgid_plural flags comment tcomment location"
+    "Message",
+    "msgctxt msgid msgid_plural flags comment tcomment location domain",
+    defaults=(None,),
 )
 
-EXTRACTORS = {}
+# The domain of messages which are only extracted if no domain is selected,
+# such as template messages outside of any i18n:domain. A domain of None
+# means a message is extracted for every domain.
+NO_DOMAIN = ""
+
+
+class ExtractorRegistry(MutableMapping):
+    """Mapping of extractor names to extractors.
+
+    Extractors can be registered with a loader function, which is only
+    called when the extractor is used for the first time. This prevents
+    importing extractor modules and their dependencies if they are not
+    needed.
+    """
+
+    def __init__(self):
+        self._extractors = {}
+        self._loaders = {}
+
+    def register_loader(self, name, loader):
+        """Register a function which returns the extractor, or None if the
+        extractor is not available."""
+        self._extractors.pop(name, None)
+        self._loaders[name] = loader
+
+    def __getitem__(self, name):
+        try:
+            return self._extractors[name]
+        except KeyError:
+            pass
+        extractor = self._loaders.pop(name)()
+        if extractor is None:
+            raise KeyError(name)
+        self._extractors[name] = extractor
+        return extractor
+
+    def __setitem__(self, name, extractor):
+        self._loaders.pop(name, None)
+        self._extractors[name] = extractor
+
+    def __delitem__(self, name):
+        if name in self._loaders:
+            del self._loaders[name]
+        else:
+            del self._extractors[name]
+
+    def __contains__(self, name):
+        return name in self._extractors or name in self._loaders
+
+    def loaded(self):
+        """Return the ``(name, extractor)`` pairs for all extractors which
+        have been loaded."""
+        return list(self._extractors.items())
+
+    def __iter__(self):
+        return iter(list(self._extractors) + list(self._loaders))
+
+    def __len__(self):
+        return len(self._extractors) + len(self._loaders)
+
+
+EXTRACTORS = ExtractorRegistry()
 EXTENSIONS = {}
+PATHS = PathRoutes()
 
+# The extensions handled by the extractors included in lingua, so we can
+# register them without importing their modules.
+BUILTIN_EXTENSIONS = {
+    "lingua.extractors.python:PythonExtractor": [".py"],
+    "lingua.extractors.xml:ChameleonExtractor": [".pt"],
+    "lingua.extractors.xml:ZopeExtractor": [".zpt", ".cpt"],
+    "lingua.extractors.zcml:ZCMLExtractor": [".zcml"],
+}
 
-def get_extractor(filename):
-    ext = os.path.splitext(filename)[1]
+
+class ExtractionError(Exception):
+    """Raised when messages can not be extracted."""
+
+
+def get_extractor_name(filename):
+    """Return the name of the extractor to use for a file, or None if no
+    extractor is available for it."""
+    extractor = None
+    if PATHS:
+        extractor = PATHS.match(os.path.normpath(filename).replace(os.sep, "/"))
+    if extractor is None:
+        extractor = EXTENSIONS.get(os.path.splitext(filename)[1])
+    if not extractor:
+        return None
     try:
-        return EXTRACTORS[EXTENSIONS[ext]]
+        EXTRACTORS[extractor]
     except KeyError:
         return None
+    return extractor
+
+
+def get_extractor(filename):
+    extractor = get_extractor_name(filename)
+    if extractor is None:
+        return None
+    return EXTRACTORS[extractor]
 
 
 # Based on http://www.cplusplus.com/reference/cstdio/printf/
@@ -136,11 +237,49 @@ def update_keywords(keywords, specs):
         try:
             kw = Keyword.from_spec(spec)
         except ValueError as e:
-            print(e, file=sys.stderr)
-            sys.exit(1)
+            raise ExtractionError(str(e))
         keywords[kw.function] = kw
 
 
+class KeywordRegistry(object):
+    """An immutable collection of keywords.
+
+    ``keywords`` maps function names to :py:class:`Keyword` instances.
+    ``pattern`` is a compiled bytes pattern which finds any of the functions,
+    or ``_``, followed by an opening parenthesis. Whitespace, comments and
+    line continuations are allowed before the parenthesis.
+    """
+
+    __slots__ = ("keywords", "pattern")
+
+    def __init__(self, keywords):
+        keywords = types.MappingProxyType(dict(keywords))
+        names = b"|".join(
+            re.escape(name.encode("utf-8")) for name in sorted(keywords) + ["_"]
+        )
+        pattern = re.compile(rb"\b(?:%s)(?:\s|\\|#[^\n]*)*\(" % names)
+        object.__setattr__(self, "keywords", keywords)
+        object.__setattr__(self, "pattern", pattern)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def __reduce__(self):
+        return (type(self), (dict(self.keywords),))
+
+    def __contains__(self, name):
+        return name in self.keywords
+
+    def __getitem__(self, name):
+        return self.keywords[name]
+
+    def __iter__(self):
+        return iter(self.keywords)
+
+    def __len__(self):
+        return len(self.keywords)
+
+
 @add_metaclass(abc.ABCMeta)
 class Extractor(object):
     default_config = {}
@@ -153,6 +292,15 @@ class Extractor(object):
     def update_config(self, **kw):
         self.config.update(kw)
 
+    def may_contain_messages(self, filename, options):
+        """Check if a file may contain messages.
+
+        This is called before the extractor is called for a file. Extractors
+        can return False if a quick check shows the file can not contain any
+        messages, so the file is skipped.
+        """
+        return True
+
     @abc.abstractproperty
     def extensions(self):
         raise NotImplementedError()
@@ -162,17 +310,31 @@ class Extractor(object):
         raise NotImplementedError()
 
 
+def _load_extractor(entry_point):
+    try:
+        extractor = load_entry_point(entry_point)
+    except EntryPointLoadError:
+        # skip this entry point since at least one required dependency can
+        # not be found
+        return None
+    if not issubclass(extractor, Extractor):
+        raise ValueError("Registered extractor must derive from ``Extractor``")
+    return extractor()
+
+
 def register_extractors():
     for entry_point in iter_entry_points("lingua.extractors"):
-        try:
-            extractor = load_entry_point(entry_point)
-        except EntryPointLoadError:
-            # skip this entry point since at least one required dependency can
-            # not be found
-            extractor = None
-        if extractor:
-            if not issubclass(extractor, Extractor):
-                raise ValueError("Registered extractor must derive from ``Extractor``")
-            EXTRACTORS[entry_point.name] = extractor()
-            for extension in extractor.extensions:
-                EXTENSIONS[extension] = entry_point.name
+        extensions = BUILTIN_EXTENSIONS.get(entry_point_target(entry_point))
+        if extensions is not None:
+            EXTRACTORS.register_loader(
+                entry_point.name, functools.partial(_load_extractor, entry_point)
+            )
+        else:
+            # We need to load other extractors to find their extensions.
+            extractor = _load_extractor(entry_point)
+            if extractor is None:
+                continue
+            EXTRACTORS[entry_point.name] = extractor
+            extensions = extractor.extensions
+        for extension in extensions:
+            EXTENSIONS[extension] = entry_point.name
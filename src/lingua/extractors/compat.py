@@ -24,6 +24,9 @@ try:
     def load_entry_point(entry_point):
         return entry_point.load()
 
+    def entry_point_target(entry_point):
+        return entry_point.value
+
 except ImportError:
     from pkg_resources import DistributionNotFound
     from pkg_resources import working_set
@@ -36,6 +39,9 @@ except ImportError:
     def load_entry_point(entry_point):
         return entry_point.load(require=True)
 
+    def entry_point_target(entry_point):
+        return "%s:%s" % (entry_point.module_name, ".".join(entry_point.attrs))
+
 
 def add_metaclass(metaclass):
     """Class decorator for creating a class with a metaclass."""
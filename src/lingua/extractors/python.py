@@ -1,15 +1,21 @@
 from __future__ import print_function
 import ast
+import bisect
+import functools
 import io
+import mmap
+import re
 import sys
 import tokenize
 import warnings
+from . import ExtractionError
 from . import Extractor
 from . import Message
 from . import check_comment_flags
 from . import check_c_format
 from . import check_python_format
 from . import Keyword
+from . import KeywordRegistry
 from . import update_keywords
 
 
@@ -33,6 +39,23 @@ KEYWORDS = {
 }
 
 
+@functools.lru_cache(maxsize=16)
+def keyword_registry(specs=()):
+    """Return a registry with the default keywords, updated with a tuple of
+    keyword specifications."""
+    keywords = dict(KEYWORDS)
+    update_keywords(keywords, specs)
+    return KeywordRegistry(keywords)
+
+
+def get_keywords(options):
+    """Return the keyword registry for extractor options."""
+    registry = getattr(options, "keyword_registry", None)
+    if isinstance(registry, KeywordRegistry):
+        return registry
+    return keyword_registry(tuple(options.keywords))
+
+
 class ParseError(ValueError):
     def __init__(self, msg, lineno):
         self.lineno = lineno
@@ -170,7 +193,7 @@ class TokenStreamer(object):
 class PythonParser(object):
     last_comment = (-2, None)
 
-    def __call__(self, token_stream, options, filename, firstline):
+    def setup(self, options, filename, firstline):
         self.options = options
         if options.comment_tag is True:
             self.include_comments = "all"
@@ -182,24 +205,24 @@ class PythonParser(object):
         self.filename = filename
         self.firstline = firstline
         self.messages = []
+        self.registry = get_keywords(options)
+        self.keywords = self.registry.keywords
+
+    def __call__(self, token_stream, options, filename, firstline):
+        self.setup(options, filename, firstline)
         self.handler = self.state_skip
         try:
             for (token_type, token, location, _) in token_stream:
                 self.process_token(token_type, token, location, token_stream)
         except tokenize.TokenError as e:
-            print(
-                "Aborting due to parse error in %s[%d]: %s"
-                % (filename, firstline + e.args[1][0], e.args[0]),
-                file=sys.stderr,
+            raise ExtractionError(
+                "Parse error in %s[%d]: %s"
+                % (filename, firstline + e.args[1][0], e.args[0])
             )
-            sys.exit(1)
         except ParseError as e:
-            print(
-                "Aborting due to parse error in %s[%d]: %s"
-                % (filename, firstline + e.lineno, e.args[0]),
-                file=sys.stderr,
+            raise ExtractionError(
+                "Parse error in %s[%d]: %s" % (filename, firstline + e.lineno, e.args[0])
             )
-            sys.exit(1)
         return self.messages
 
     def process_token(self, token_type, token, location, token_stream):
@@ -232,14 +255,8 @@ class PythonParser(object):
                 if self.messages[-1].comment:
                     new_comment.append(last_message.comment)
                 new_comment.append(comment)
-                self.messages[-1] = Message(
-                    last_message.msgctxt,
-                    last_message.msgid,
-                    last_message.msgid_plural,
-                    last_message.flags,
-                    "\n".join(new_comment),
-                    last_message.tcomment,
-                    last_message.location,
+                self.messages[-1] = last_message._replace(
+                    comment="\n".join(new_comment)
                 )
             else:
                 if self.last_comment[0] == location[0] - 1:
@@ -249,9 +266,9 @@ class PythonParser(object):
 
     def state_skip(self, token_type, token, location, token_stream):
         """Ignore all input until we see one of our keywords."""
-        if token_type == tokenize.NAME and (token in KEYWORDS or token == "_"):
+        if token_type == tokenize.NAME and (token in self.keywords or token == "_"):
             self.handler = self.state_in_keyword
-            self.keyword = KEYWORDS.get(token, None)
+            self.keyword = self.keywords.get(token, None)
             self.lineno = location[0]
         elif token_type == tokenize.NAME and token == "def":
             self.handler = self.state_skip_function_def
@@ -389,10 +406,323 @@ class PythonParser(object):
                 comment,
                 "",
                 (self.filename, self.firstline + self.lineno),
+                msg[0] or None,
             )
         )
 
 
+class Unsupported(Exception):
+    """Raised if the AST engine can not be sure to find the same messages as
+    the tokenize engine."""
+
+
+# Find comments, skipping over strings which might contain a hash.
+_COMMENT_OR_STRING = re.compile(
+    rb"(#[^\r\n]*)"
+    rb'|"""(?:[^"\\]+|\\(?:\r\n|.)|"(?!""))*"""'
+    rb"|'''(?:[^'\\]+|\\(?:\r\n|.)|'(?!''))*'''"
+    rb'|"(?:[^"\\\r\n]+|\\(?:\r\n|.))*"'
+    rb"|'(?:[^'\\\r\n]+|\\(?:\r\n|.))*'",
+    re.DOTALL,
+)
+_COMMENT = re.compile(rb"#[^\r\n]*")
+_WHITESPACE = re.compile(rb"[\s\\]+")
+_TRAILING_NAME = re.compile(rb"(\w+)$")
+
+_BRACKETS = {
+    ast.Tuple: b"(",
+    ast.GeneratorExp: b"(",
+    ast.List: b"[",
+    ast.ListComp: b"[",
+    ast.Set: b"{",
+    ast.SetComp: b"{",
+    ast.Dict: b"{",
+    ast.DictComp: b"{",
+}
+
+
+class AstPythonParser(PythonParser):
+    """Find messages using the ``ast`` module.
+
+    This only visits keyword calls in the syntax tree, and finds comments
+    with a regular expression instead of tokenizing the whole source. The
+    keyword calls and comments are then handled in source order by the same
+    code as the tokenize engine, so both engines find the same messages.
+    Sources which can not be parsed, or keyword calls with arguments the
+    tokenize engine treats in unusual ways, raise :py:class:`Unsupported`.
+    """
+
+    def __call__(self, source, options, filename, firstline):
+        if source.count("\r") != source.count("\r\n"):
+            # tokenize does not treat a lone CR as a line break.
+            raise Unsupported()
+        try:
+            tree = ast.parse(source)
+            self.data = source.encode("utf-8")
+        except (SyntaxError, ValueError, UnicodeError, RecursionError, MemoryError):
+            raise Unsupported()
+        self.setup(options, filename, firstline)
+        self.lines = self.data.split(b"\n")
+        self.line_offsets = None
+        self.comments = None
+        events = []
+        lines = self.candidate_lines()
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if getattr(node, "end_lineno", None) is not None:
+                # Skip nodes which can not contain a keyword call.
+                index = bisect.bisect_left(lines, node.lineno)
+                if index == len(lines) or lines[index] > node.end_lineno:
+                    continue
+            if isinstance(node, ast.Call):
+                call = self.keyword_call(node)
+                if call is not None:
+                    events.append(((node.end_lineno, 0, node.end_col_offset), call))
+                    stack.append(node.func)
+                    continue
+            stack.extend(ast.iter_child_nodes(node))
+        if events and self.include_comments != "none":
+            for (lineno, comment) in self.find_comments():
+                events.append(((lineno, 1, 0), (lineno, comment)))
+        events.sort(key=lambda event: event[0])
+        for (position, event) in events:
+            if len(event) == 2:
+                (lineno, comment) = event
+                self.process_comment(comment, (lineno, 0))
+            else:
+                (self.keyword, self.lineno, self.arguments) = event
+                self.process_keyword()
+        return self.messages
+
+    def candidate_lines(self):
+        """Return the line numbers of all keywords followed by a parenthesis,
+        including those in strings and comments."""
+        lines = []
+        lineno = 1
+        position = 0
+        for m in self.registry.pattern.finditer(self.data):
+            start = m.start()
+            lineno += self.data.count(b"\n", position, start)
+            position = start
+            if not lines or lines[-1] != lineno:
+                lines.append(lineno)
+        return lines
+
+    def offset(self, lineno, col):
+        if self.line_offsets is None:
+            offsets = [0]
+            for line in self.lines:
+                offsets.append(offsets[-1] + len(line) + 1)
+            self.line_offsets = offsets
+        return self.line_offsets[lineno - 1] + col
+
+    def code(self, start, end):
+        """Return the code between two positions, without whitespace,
+        comments and line continuations."""
+        text = self.data[self.offset(*start) : self.offset(*end)]
+        if b"#" in text:
+            text = _COMMENT.sub(b"", text)
+        return _WHITESPACE.sub(b"", text)
+
+    def find_comments(self):
+        """Return the line number and text of all comments."""
+        if self.comments is None:
+            self.comments = []
+            if b"#" in self.data:
+                lineno = 1
+                position = 0
+                for m in _COMMENT_OR_STRING.finditer(self.data):
+                    if m.group(1) is None:
+                        continue
+                    start = m.start()
+                    lineno += self.data.count(b"\n", position, start)
+                    position = start
+                    self.comments.append((lineno, m.group(1).decode("utf-8")))
+        return self.comments
+
+    def follows_keyword(self, node):
+        """Check if a keyword call directly follows another keyword name.
+
+        The tokenize engine sees the name of the call as the token after
+        that keyword, and does not handle it as keyword call."""
+        lineno = node.lineno
+        text = self.lines[lineno - 1][: node.col_offset].rstrip()
+        while not text:
+            lineno -= 1
+            if lineno == 0:
+                return False
+            text = self.lines[lineno - 1]
+            if b"#" in text:
+                for (comment_lineno, comment) in self.find_comments():
+                    if comment_lineno == lineno:
+                        text = text[: text.rindex(comment.encode("utf-8"))]
+                        break
+            text = text.rstrip(b" \t\f\r\\")
+        m = _TRAILING_NAME.search(text)
+        if m is None or m.group(1)[:1].isdigit():
+            return False
+        name = m.group(1).decode("utf-8")
+        return name in self.keywords or name == "_"
+
+    def keyword_call(self, node):
+        """Return the keyword, line number and arguments of a keyword call,
+        or None if node is not a keyword call."""
+        func = node.func
+        if isinstance(func, ast.Name):
+            name = func.id
+        elif isinstance(func, ast.Attribute):
+            name = func.attr
+        else:
+            return None
+        if name not in self.keywords and name != "_":
+            return None
+        if isinstance(func, ast.Name) and self.follows_keyword(func):
+            return None
+        arguments = []
+        position = (func.end_lineno, func.end_col_offset)
+        separator = b"("
+        for arg in node.args:
+            if self.code(position, (arg.lineno, arg.col_offset)) != separator:
+                raise Unsupported()
+            value = self.argument_value(arg, False)
+            arguments.append((None, value, arg.lineno))
+            position = (arg.end_lineno, arg.end_col_offset)
+            if isinstance(value, (int, float, complex)):
+                # The tokenize engine only accepts a number as last argument,
+                # without a trailing comma.
+                separator = None
+            else:
+                separator = b","
+        for keyword in node.keywords:
+            value = keyword.value
+            if keyword.arg is None:
+                raise Unsupported()
+            if separator is None:
+                raise Unsupported()
+            expected = separator + keyword.arg.encode("utf-8") + b"="
+            if self.code(position, (value.lineno, value.col_offset)) != expected:
+                raise Unsupported()
+            arguments.append(
+                (keyword.arg, self.argument_value(value, True), value.lineno)
+            )
+            position = (value.end_lineno, value.end_col_offset)
+            separator = b","
+        end = self.code(position, (node.end_lineno, node.end_col_offset))
+        if not arguments:
+            valid = end == b"()"
+        else:
+            valid = end == b")" or (separator is not None and end == b",)")
+        if not valid:
+            raise Unsupported()
+        return (self.keywords.get(name, None), func.end_lineno, arguments)
+
+    def is_dotted_name(self, node):
+        while isinstance(node, ast.Attribute):
+            node = node.value
+        return isinstance(node, ast.Name)
+
+    def argument_value(self, node, keyword):
+        """Return the value the tokenize engine finds for an argument."""
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, (str, bytes)):
+                return value
+            elif value is None or isinstance(value, bool):
+                return DYNAMIC
+            elif isinstance(value, (int, float, complex)) and not keyword:
+                # The tokenize engine does not accept numbers as keyword
+                # argument.
+                return value
+        elif isinstance(node, ast.Name):
+            return DYNAMIC
+        elif isinstance(node, (ast.Attribute, ast.Call, ast.Subscript)):
+            # Only a.b, a.b(...) and a.b[...] are a single argument for the
+            # tokenize engine.
+            name = node
+            if isinstance(node, ast.Call):
+                name = node.func
+            elif isinstance(node, ast.Subscript):
+                name = node.value
+            if self.is_dotted_name(name):
+                code = self.code(
+                    (name.lineno, name.col_offset),
+                    (name.end_lineno, name.end_col_offset),
+                )
+                if b"(" not in code:
+                    return DYNAMIC
+        elif type(node) in _BRACKETS:
+            start = self.offset(node.lineno, node.col_offset)
+            if self.data[start : start + 1] == _BRACKETS[type(node)]:
+                return DYNAMIC
+        raise Unsupported()
+
+
+class ExpressionParser(PythonParser):
+    """Extract messages from many Python expressions in one tokenizer pass.
+
+    Every expression is put on its own lines between parentheses, so the
+    tokenizer never sees indentation or statement boundaries. The parser
+    state is reset at the start of every expression, which gives the same
+    messages as parsing every expression separately.
+    """
+
+    def __call__(self, expressions, options, filename):
+        self.setup(options, filename, 0)
+        if not expressions:
+            return []
+        self.starts = []
+        self.firstlines = []
+        chunks = []
+        lineno = 1
+        for (source, firstline) in expressions:
+            self.starts.append(lineno)
+            # Line numbers inside an expression start at the line after the
+            # opening parenthesis.
+            self.firstlines.append(firstline - lineno)
+            chunks.append("(\n%s\n)\n" % source)
+            lineno += source.count("\n") + 3
+        token_stream = TokenStreamer(io.StringIO("".join(chunks)).readline)
+        results = []
+        try:
+            for (token_type, token, location, _) in token_stream:
+                while len(results) < len(self.starts) and (
+                    location[0] >= self.starts[len(results)]
+                ):
+                    self.start_expression(len(results))
+                    results.append(self.messages)
+                self.process_token(token_type, token, location, token_stream)
+        except tokenize.TokenError as e:
+            raise ExtractionError(
+                "Parse error in %s[%d]: %s"
+                % (filename, self.expression_line(e.args[1][0]), e.args[0])
+            )
+        except ParseError as e:
+            raise ExtractionError(
+                "Parse error in %s[%d]: %s"
+                % (filename, self.expression_line(e.lineno), e.args[0])
+            )
+        return results
+
+    def start_expression(self, index):
+        self.firstline = self.firstlines[index]
+        self.messages = []
+        self.last_comment = PythonParser.last_comment
+        self.handler = self.state_skip
+
+    def expression_line(self, lineno):
+        index = max(bisect.bisect_right(self.starts, lineno) - 1, 0)
+        return self.firstlines[index] + lineno
+
+
+def _extract_python_expressions(filename, expressions, options):
+    """Extract messages from a list of ``(source, firstline)`` tuples.
+
+    This returns a list with the messages for every expression.
+    """
+    return ExpressionParser()(expressions, options, filename)
+
+
 def _extract_python(filename, source, options, firstline=0):
     if isinstance(source, bytes):
         source = source.decode("utf-8")
@@ -405,11 +735,40 @@ class PythonExtractor(Extractor):
     """Python sources"""
 
     extensions = [".py"]
+    default_config = {
+        "engine": "tokenize",
+    }
+
+    def may_contain_messages(self, filename, options):
+        """Search the file for a keyword followed by a parenthesis."""
+        pattern = get_keywords(options).pattern
+        try:
+            with io.open(filename, "rb") as input:
+                try:
+                    data = mmap.mmap(input.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty files can not be mapped.
+                    return False
+                with data:
+                    return pattern.search(data) is not None
+        except OSError:
+            return True
 
     def __call__(self, filename, options, fileobj=None, lineno=0):
-        update_keywords(KEYWORDS, options.keywords)
+        engine = self.config["engine"]
+        if engine not in ("tokenize", "ast"):
+            raise ExtractionError("Unknown Python extraction engine: %s" % engine)
         if fileobj is None:
             fileobj = _open(filename)
+        if engine == "ast":
+            source = fileobj.read()
+            if isinstance(source, bytes):
+                fileobj = io.BytesIO(source)
+            else:
+                try:
+                    return AstPythonParser()(source, options, filename, lineno)
+                except Unsupported:
+                    fileobj = io.StringIO(source)
         token_stream = TokenStreamer(fileobj.readline)
         parser = PythonParser()
         return parser(token_stream, options, filename, lineno)
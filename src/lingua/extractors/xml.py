@@ -2,6 +2,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 import ast
 import collections
+import functools
 
 try:
     from collections import OrderedDict
@@ -17,9 +18,12 @@ from chameleon.tal import parse_defines
 from chameleon.tales import split_parts
 from chameleon.utils import decode_htmlentities
 
-from .python import _extract_python
+from lingua.cache import expression_cache
+from .python import _extract_python_expressions
+from . import ExtractionError
 from . import Extractor
 from . import Message
+from . import NO_DOMAIN
 
 
 def _open(filename):
@@ -98,6 +102,7 @@ class TranslateContext(object):
             "\n".join(comments),
             "",
             (self.filename, self.lineno),
+            self.domain,
         )
 
 
@@ -136,26 +141,30 @@ class ChameleonExtractor(Extractor, ElementProgram):
         self.domainstack = collections.deque([(None, None, None)])
         self.translatestack = collections.deque([None])
         self.linenumber = 1
+        self.expressions = []
         if fileobj is None:
             fileobj = _open(filename)
         try:
             source = fileobj.read().decode("utf-8")
             ElementProgram.__init__(self, source, filename=filename)
         except UnicodeDecodeError as e:
-            print(
-                "Aborting due to parse error in %s: %s" % (self.filename, e),
-                file=sys.stderr,
-            )
-            sys.exit(1)
+            raise ExtractionError("Parse error in %s: %s" % (self.filename, e))
         except KeyError as e:  # Chameleon attribute error
-            print(
-                "Aborting due to parse error in %s: %s" % (self.filename, e.message),
-                file=sys.stderr,
-            )
-            sys.exit(1)
-        return [
-            m.message() if isinstance(m, TranslateContext) else m for m in self.messages
-        ]
+            raise ExtractionError("Parse error in %s: %s" % (self.filename, e))
+        except ExtractionError:
+            # Report errors in earlier Python expressions first.
+            self.parse_expressions()
+            raise
+        self.parse_expressions()
+        messages = []
+        for m in self.messages:
+            if isinstance(m, TranslateContext):
+                messages.append(m.message())
+            elif isinstance(m, list):
+                messages.extend(m)
+            else:
+                messages.append(m)
+        return messages
 
     def visit(self, kind, args):
         visitor = getattr(self, "visit_%s" % kind, None)
@@ -256,7 +265,7 @@ class ChameleonExtractor(Extractor, ElementProgram):
             for (attribute, value) in attributes.items():
                 value = decode_htmlentities(value)
                 for source in self.get_code_for_attribute(attribute, value):
-                    self.parse_python(source)
+                    self.parse_python(source, in_text=False)
 
         self.linenumber = childs_lineno
         for child in children:
@@ -284,13 +293,12 @@ class ChameleonExtractor(Extractor, ElementProgram):
                 try:
                     for source in get_python_expressions(line, default_engine):
                         if UNDERSCORE_CALL.search(source):
-                            self.parse_python(source)
+                            self.parse_python(source, in_text=True)
                 except SyntaxError:
-                    print(
-                        "Aborting due to Python syntax error in %s[%d]: %s"
+                    raise ExtractionError(
+                        "Python syntax error in %s[%d]: %s"
                         % (self.filename, self.linenumber, line)
                     )
-                    sys.exit(1)
             if self.translatestack[-1]:
                 self.translatestack[-1].add_text(data)
         self.linenumber += get_newline_count(data)
@@ -323,16 +331,16 @@ class ChameleonExtractor(Extractor, ElementProgram):
                 comment,
                 "",
                 (self.filename, self.linenumber + offset),
+                self.domainstack[-1][0] or NO_DOMAIN,
             )
         )
 
     def _assert_valid_python(self, value):
         if not is_valid_python(value):
-            print(
-                "Aborting due to Python syntax error in %s[%d]: %s"
+            raise ExtractionError(
+                "Python syntax error in %s[%d]: %s"
                 % (self.filename, self.linenumber, value)
             )
-            sys.exit(1)
 
     def get_code_for_attribute(self, attribute, value):
         default_engine = self.config["default-engine"]
@@ -361,8 +369,8 @@ class ChameleonExtractor(Extractor, ElementProgram):
             elif attribute[1] == "repeat":
                 defines = parse_defines(value)
                 if len(defines) != 1:
-                    print(
-                        "Aborting due to syntax error in %s[%d]: %s"
+                    raise ExtractionError(
+                        "Syntax error in %s[%d]: %s"
                         % (self.filename, self.linenumber, value)
                     )
                 scope, var, value = defines[0]
@@ -375,23 +383,69 @@ class ChameleonExtractor(Extractor, ElementProgram):
                 for source in get_python_expressions(value, default_engine):
                     yield source
             except SyntaxError:
-                print(
-                    "Aborting due to Python syntax error in %s[%d]: %s"
+                raise ExtractionError(
+                    "Python syntax error in %s[%d]: %s"
                     % (self.filename, self.linenumber, value)
                 )
-                sys.exit(1)
 
-    def parse_python(self, source):
+    def parse_python(self, source, in_text):
+        """Queue a Python expression. All expressions in a template are
+        tokenized at once by parse_expressions, which replaces the
+        placeholder with the messages found.
+
+        The domain of messages follows the domain filter: expressions in
+        text are only extracted for the domain of the text, and expressions
+        in attributes for every domain.
+        """
         assert isinstance(source, type(""))
-        for message in _extract_python(
-            self.filename, source, self.options, self.linenumber
-        ):
-            self.messages.append(
-                Message(
-                    *message[:6],
-                    location=(self.filename, self.linenumber + message.location[1])
+        placeholder = []
+        self.messages.append(placeholder)
+        domain = (self.domainstack[-1][0] or NO_DOMAIN) if in_text else None
+        self.expressions.append((source, self.linenumber, domain, placeholder))
+
+    def parse_expressions(self):
+        """Extract the messages from all queued expressions. Expressions
+        which are not in the expression cache are tokenized together."""
+        expressions = self.expressions
+        self.expressions = []
+        signature = expression_cache.signature(self.options)
+        found = {}
+        missing = OrderedDict()
+        for (source, linenumber, _, _) in expressions:
+            if source in found or source in missing:
+                continue
+            messages = expression_cache.get(signature, source)
+            if messages is None:
+                missing[source] = linenumber
+            else:
+                found[source] = messages
+        results = _extract_python_expressions(
+            self.filename, list(missing.items()), self.options
+        )
+        for ((source, linenumber), messages) in zip(missing.items(), results):
+            # Store line numbers relative to the expression.
+            found[source] = [
+                message._replace(location=(None, message.location[1] - linenumber))
+                for message in messages
+            ]
+            expression_cache.set(signature, source, found[source])
+        for (source, linenumber, domain, placeholder) in expressions:
+            for message in found[source]:
+                lineno = linenumber + message.location[1]
+                if domain is None:
+                    message_domain = message.domain
+                elif message.domain in (None, domain):
+                    message_domain = domain
+                else:
+                    # The domain filter requires both domains to match.
+                    message_domain = NO_DOMAIN
+                placeholder.append(
+                    message._replace(
+                        flags=list(message.flags),
+                        location=(self.filename, linenumber + lineno),
+                        domain=message_domain,
+                    )
                 )
-            )
 
 
 class ZopeExtractor(ChameleonExtractor):
@@ -403,6 +457,7 @@ class ZopeExtractor(ChameleonExtractor):
     }
 
 
+@functools.lru_cache(maxsize=4096)
 def is_valid_python(source):
     try:
         ast.parse(source, mode="eval")
@@ -1,8 +1,8 @@
 from __future__ import absolute_import
 from __future__ import print_function
 import collections
-import sys
 from xml.parsers import expat
+from . import ExtractionError
 from . import Extractor
 from . import Message
 
@@ -31,10 +31,7 @@ class ZCMLExtractor(Extractor):
         try:
             self.parser.ParseFile(fileobj)
         except expat.ExpatError as e:
-            print(
-                "Aborting due to parse error in %s: %s" % (filename, e), file=sys.stderr
-            )
-            sys.exit(1)
+            raise ExtractionError("Parse error in %s: %s" % (filename, e))
         return self.messages
 
     def add_message(self, msgid):
@@ -47,6 +44,7 @@ class ZCMLExtractor(Extractor):
                 "",
                 "",
                 (self.filename, (self.parser.CurrentLineNumber)),
+                self.domainstack[-1],
             )
         )
 
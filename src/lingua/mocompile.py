@@ -0,0 +1,281 @@
+from concurrent.futures import ProcessPoolExecutor
+import array
+import hashlib
+import io
+import os
+import struct
+import sys
+import tempfile
+import click
+import polib
+from lingua.cli import parse_jobs
+from lingua import __version__
+
+
+MO_MAGIC = 0x950412DE
+HASH_HEADER = "X-Lingua-Source-Hash"
+
+
+def hash_string(text):
+    """Return the hash used by GNU gettext to find a message in a MO file."""
+    hval = 0
+    for char in text:
+        if char == 0:
+            break
+        hval = (hval << 4) + char
+        hval &= 0xFFFFFFFF
+        g = hval & 0xF0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
+
+
+def _is_prime(number):
+    if number < 4:
+        return number > 1
+    if number % 2 == 0:
+        return False
+    divisor = 3
+    while divisor * divisor <= number:
+        if number % divisor == 0:
+            return False
+        divisor += 2
+    return True
+
+
+def hash_table_size(count):
+    """Return the hash table size msgfmt uses for a number of messages."""
+    size = max(3, count * 4 // 3)
+    while not _is_prime(size):
+        size += 1
+    return size
+
+
+def build_hash_table(originals):
+    """Build the hash table for a list of encoded original strings.
+
+    Every slot contains the index of a message plus one, or 0 for an empty
+    slot. Collisions are resolved with double hashing, like GNU gettext does.
+    """
+    size = hash_table_size(len(originals))
+    table = array.array("I", [0]) * size
+    for (index, original) in enumerate(originals):
+        hval = hash_string(original)
+        slot = hval % size
+        increment = 1 + (hval % (size - 2))
+        while table[slot]:
+            if slot >= size - increment:
+                slot -= size - increment
+            else:
+                slot += increment
+        table[slot] = index + 1
+    return table
+
+
+def _included(entry, use_fuzzy):
+    if entry.obsolete or not entry.msgid:
+        return False
+    if entry.translated():
+        return True
+    if use_fuzzy and entry.fuzzy:
+        if entry.msgid_plural:
+            return any(entry.msgstr_plural.values())
+        return bool(entry.msgstr)
+    return False
+
+
+def _header(catalog, extra_headers):
+    lines = ["%s: %s" % item for item in catalog.ordered_metadata()]
+    lines.extend("%s: %s" % item for item in extra_headers)
+    return "".join(line + "\n" for line in lines)
+
+
+def mo_data(catalog, use_fuzzy=False, extra_headers=()):
+    """Return the contents of a MO file for a catalog.
+
+    Only translated messages are included, unless ``use_fuzzy`` is set, in
+    which case translated fuzzy messages are included as well. The file
+    contains a hash table, so the GNU gettext runtime can find messages
+    without a binary search.
+    """
+    encoding = catalog.encoding
+    messages = []
+    if catalog.metadata or extra_headers:
+        messages.append((b"", _header(catalog, extra_headers).encode(encoding)))
+    for entry in catalog:
+        if not _included(entry, use_fuzzy):
+            continue
+        original = entry.msgid
+        if entry.msgctxt is not None:
+            original = "%s\x04%s" % (entry.msgctxt, original)
+        if entry.msgid_plural:
+            original = "%s\0%s" % (original, entry.msgid_plural)
+            translation = "\0".join(
+                entry.msgstr_plural[i] for i in sorted(entry.msgstr_plural)
+            )
+        else:
+            translation = entry.msgstr
+        messages.append((original.encode(encoding), translation.encode(encoding)))
+    messages.sort()
+
+    count = len(messages)
+    hash_table = build_hash_table([original for (original, translation) in messages])
+    originals_offset = 7 * 4
+    translations_offset = originals_offset + count * 8
+    hash_offset = translations_offset + count * 8
+    offset = hash_offset + len(hash_table) * 4
+    originals = []
+    translations = []
+    strings = []
+    for column in (originals, translations):
+        index = 0 if column is originals else 1
+        for message in messages:
+            column.extend([len(message[index]), offset])
+            strings.append(message[index] + b"\0")
+            offset += len(message[index]) + 1
+    header = struct.pack(
+        "<7I",
+        MO_MAGIC,
+        0,
+        count,
+        originals_offset,
+        translations_offset,
+        len(hash_table),
+        hash_offset,
+    )
+    tables = array.array("I", originals + translations) + hash_table
+    if sys.byteorder != "little":
+        tables.byteswap()
+    return b"".join([header, tables.tobytes()] + strings)
+
+
+def read_source_hash(filename):
+    """Return the source hash stored in the header of a MO file."""
+    try:
+        with io.open(filename, "rb") as input:
+            data = input.read()
+        (magic, revision, count, originals, translations) = struct.unpack(
+            "<IiiII", data[:20]
+        )
+        if magic != MO_MAGIC or count < 1:
+            return None
+        (length, offset) = struct.unpack("<II", data[originals : originals + 8])
+        if length:
+            return None
+        (length, offset) = struct.unpack("<II", data[translations : translations + 8])
+        header = data[offset : offset + length]
+    except (OSError, struct.error):
+        return None
+    prefix = ("%s: " % HASH_HEADER).encode("ascii")
+    for line in header.split(b"\n"):
+        if line.startswith(prefix):
+            return line[len(prefix) :].decode("ascii", "replace")
+    return None
+
+
+def source_hash(data, use_fuzzy):
+    digest = hashlib.sha1()
+    digest.update(repr([__version__, use_fuzzy]).encode("utf-8"))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def compile_file(source, target, use_fuzzy=False, force=False):
+    """Compile a PO file to a MO file.
+
+    The MO file is not written if it was created from a PO file with the
+    same contents, unless ``force`` is set. This returns the number of
+    messages in the MO file, or None if it was up to date.
+    """
+    with io.open(source, "rb") as input:
+        fingerprint = source_hash(input.read(), use_fuzzy)
+    if not force and read_source_hash(target) == fingerprint:
+        return None
+    catalog = polib.pofile(source)
+    data = mo_data(catalog, use_fuzzy, [(HASH_HEADER, fingerprint)])
+    (fd, tmpfile) = tempfile.mkstemp(dir=os.path.dirname(target) or None)
+    with io.open(fd, "wb") as output:
+        output.write(data)
+    # mkstemp only makes the file readable for its owner.
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmpfile, 0o666 & ~umask)
+    os.rename(tmpfile, target)
+    # Do not count the header.
+    return struct.unpack("<I", data[8:12])[0] - 1
+
+
+def _compile(args):
+    (source, target, use_fuzzy, force) = args
+    try:
+        return (compile_file(source, target, use_fuzzy, force), None)
+    except (IOError, UnicodeDecodeError) as e:
+        return (None, str(e))
+
+
+@click.command()
+@click.option(
+    "-o",
+    "--output",
+    metavar="FILE",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Output file, if a single PO file is compiled",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default="1",
+    callback=parse_jobs,
+    metavar="N",
+    help="Number of processes to compile files with, or 'auto'",
+)
+@click.option(
+    "-f",
+    "--use-fuzzy",
+    is_flag=True,
+    help="Include fuzzy translations",
+)
+@click.option("--force", is_flag=True, help="Compile files even if they are up to date")
+@click.argument(
+    "input",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+    metavar="PO-file",
+)
+def main(output, jobs, use_fuzzy, force, input):
+    """Compile PO files to MO files
+
+    The MO file for every PO file is written next to it, unless --output is
+    used. MO files created from unchanged PO files are not compiled again.
+    """
+    if output is not None and len(input) > 1:
+        raise click.UsageError("--output can only be used with a single PO file")
+    tasks = []
+    for source in input:
+        if output is not None:
+            target = output
+        else:
+            target = os.path.splitext(source)[0] + ".mo"
+        tasks.append((source, target, use_fuzzy, force))
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            results = list(executor.map(_compile, tasks))
+    else:
+        results = [_compile(task) for task in tasks]
+    failed = False
+    for ((source, target, use_fuzzy, force), (count, error)) in zip(tasks, results):
+        if error is not None:
+            click.echo("Can not compile %s: %s" % (source, error), err=True)
+            failed = True
+        elif count is None:
+            click.echo("%s is up to date" % target)
+        else:
+            click.echo("%s: %d messages" % (target, count))
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,21 @@
+from concurrent.futures import ProcessPoolExecutor
 import click
 import collections
+import io
 import textwrap
 import polib
+from lingua.cli import parse_jobs
 
 
-def verify_po(path, show_path):
+def verify_po(path, show_path, output=None):
     leader = "[%s] " % path if show_path else ""
     try:
         catalog = polib.pofile(path)
     except UnicodeDecodeError:
-        click.echo("Character encoding problems occured while parsing %s" % path)
-        click.echo("Perhaps this is not a PO file?")
+        click.echo(
+            "Character encoding problems occured while parsing %s" % path, file=output
+        )
+        click.echo("Perhaps this is not a PO file?", file=output)
         return
     msgids = collections.defaultdict(int)
     reverse_map = collections.defaultdict(list)
@@ -24,24 +29,26 @@ def verify_po(path, show_path):
     for (key, count) in msgids.items():
         if count == 1:
             continue
-        click.echo("%sMessage repeated %d times:" % (leader, count))
+        click.echo("%sMessage repeated %d times:" % (leader, count), file=output)
         (context, msgid) = key
         if context:
             msgid = "[%s] %s" % (context, msgid)
         click.echo(
-            textwrap.fill(msgid, initial_indent=" " * 5, subsequent_indent=" " * 8)
+            textwrap.fill(msgid, initial_indent=" " * 5, subsequent_indent=" " * 8),
+            file=output,
         )
-        click.echo()
+        click.echo(file=output)
 
     for (msgstr, keys) in reverse_map.items():
         if len(keys) == 1:
             continue
 
-        click.echo("%sTranslation:" % leader)
+        click.echo("%sTranslation:" % leader, file=output)
         click.echo(
-            textwrap.fill(msgstr, initial_indent=" " * 8, subsequent_indent=" " * 8)
+            textwrap.fill(msgstr, initial_indent=" " * 8, subsequent_indent=" " * 8),
+            file=output,
         )
-        click.echo("Used for %d canonical texts:" % len(keys))
+        click.echo("Used for %d canonical texts:" % len(keys), file=output)
         for (idx, info) in enumerate(keys):
             (context, msgid) = info
             if context:
@@ -49,16 +56,39 @@ def verify_po(path, show_path):
             click.echo(
                 textwrap.fill(
                     msgid, initial_indent="%-8d" % (idx + 1), subsequent_indent=8 * " "
-                )
+                ),
+                file=output,
             )
-        click.echo()
+        click.echo(file=output)
+
+
+def check_po(path, show_path):
+    """Check a PO file, and return the report as a string."""
+    output = io.StringIO()
+    verify_po(path, show_path, output)
+    return output.getvalue()
 
 
 @click.command()
+@click.option(
+    "-j",
+    "--jobs",
+    default="1",
+    callback=parse_jobs,
+    metavar="N",
+    help="Number of processes to check files with, or 'auto'",
+)
 @click.argument("input", nargs=-1, type=click.Path(exists=True), metavar="PO-file")
-def main(input):
+def main(jobs, input):
     "Perform sanity checks on PO files"
 
     show_path = len(input) > 1
-    for path in input:
-        verify_po(path, show_path)
+    if jobs == 1 or len(input) < 2:
+        for path in input:
+            verify_po(path, show_path)
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(input))) as executor:
+        # Reports are printed in the order of the input files, as soon as the
+        # reports for all earlier files are available.
+        for report in executor.map(check_po, input, [show_path] * len(input)):
+            click.echo(report, nl=False)
@@ -0,0 +1,282 @@
+import difflib
+import io
+import os
+import re
+import shutil
+import tempfile
+import click
+import polib
+
+
+FUZZY_THRESHOLD = 0.6
+# Messages sharing less than this fraction of their trigrams with a message
+# are not considered as fuzzy match. This is deliberately much lower than
+# FUZZY_THRESHOLD, since the trigram similarity is only used to find
+# candidates, which are then compared using difflib.
+CANDIDATE_THRESHOLD = 0.3
+MAX_CANDIDATES = 10
+
+
+def trigrams(text):
+    text = " %s " % text.lower()
+    return set(text[i : i + 3] for i in range(len(text) - 2))
+
+
+class FuzzyIndex(object):
+    """Find similar messages using an index of character trigrams.
+
+    Instead of comparing a message with every message in a catalog, only
+    messages which share enough trigrams with it are compared.
+    """
+
+    def __init__(self, entries):
+        self.entries = []
+        self.sizes = []
+        self.postings = {}
+        for entry in entries:
+            grams = trigrams(entry.msgid)
+            index = len(self.entries)
+            self.entries.append(entry)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(index)
+
+    def candidates(self, msgid):
+        """Return the indexes of the entries which share enough trigrams with
+        msgid, most similar first."""
+        grams = sorted(trigrams(msgid), key=lambda g: len(self.postings.get(g, ())))
+        size = len(grams)
+        t = CANDIDATE_THRESHOLD
+        # An entry with a Dice coefficient of at least t shares at least
+        # t * size / (2 - t) trigrams with msgid, so it must contain one of
+        # the rarest size - minimum + 1 trigrams.
+        minimum = max(1, int(t * size / (2 - t)))
+        seen = set()
+        for gram in grams[: size - minimum + 1]:
+            seen.update(self.postings.get(gram, ()))
+        postings = [self.postings.get(gram, ()) for gram in grams]
+        scored = []
+        for index in seen:
+            shared = sum(1 for p in postings if index in p)
+            dice = 2.0 * shared / (size + self.sizes[index])
+            if dice >= t:
+                scored.append((-dice, index))
+        scored.sort()
+        return [index for (dice, index) in scored[:MAX_CANDIDATES]]
+
+    def search(self, msgid, threshold=FUZZY_THRESHOLD):
+        """Return the entry most similar to msgid, or None."""
+        best = None
+        best_ratio = threshold
+        for index in self.candidates(msgid):
+            entry = self.entries[index]
+            matcher = difflib.SequenceMatcher(None, msgid, entry.msgid)
+            if (
+                matcher.real_quick_ratio() < best_ratio
+                or matcher.quick_ratio() < best_ratio
+            ):
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio or (best is None and ratio == best_ratio):
+                best = entry
+                best_ratio = ratio
+        return best
+
+
+def _nplurals(catalog):
+    m = re.search(r"nplurals\s*=\s*(\d+)", catalog.metadata.get("Plural-Forms", ""))
+    return int(m.group(1)) if m else 2
+
+
+def _is_translated(entry):
+    if entry.msgid_plural:
+        return any(entry.msgstr_plural.values())
+    return bool(entry.msgstr)
+
+
+def _copy_translation(target, source, nplurals):
+    """Copy the translation of an entry. This returns True if the translation
+    could not be copied exactly."""
+    if target.msgid_plural and source.msgid_plural:
+        target.msgstr_plural = dict(source.msgstr_plural)
+        return False
+    elif target.msgid_plural:
+        target.msgstr_plural = dict((i, "") for i in range(nplurals))
+        target.msgstr_plural[0] = source.msgstr
+        return True
+    elif source.msgid_plural:
+        target.msgstr = source.msgstr_plural.get(0, "")
+        return True
+    else:
+        target.msgstr = source.msgstr
+        return False
+
+
+def merge_catalog(template, catalog, fuzzy_matching=True, previous=False):
+    """Update a translated catalog with the messages from a template.
+
+    This works like ``msgmerge``: entries are taken from the template, with
+    the translations from ``catalog``. Messages which are not in the catalog
+    get the translation of a similar message, marked as fuzzy. Translated
+    messages which are no longer in the template are marked obsolete.
+
+    This returns the new catalog and a dictionary with the number of
+    translated, fuzzy, untranslated and obsolete entries.
+    """
+    nplurals = _nplurals(catalog)
+    result = polib.POFile(wrapwidth=catalog.wrapwidth)
+    if catalog.header:
+        result.header = catalog.header
+    result.metadata = catalog.metadata.copy()
+    if "POT-Creation-Date" in template.metadata:
+        result.metadata["POT-Creation-Date"] = template.metadata["POT-Creation-Date"]
+    result.metadata_is_fuzzy = catalog.metadata_is_fuzzy
+
+    existing = {}
+    for entry in catalog:
+        existing.setdefault((entry.msgctxt, entry.msgid), entry)
+    for entry in catalog.obsolete_entries():
+        existing.setdefault((entry.msgctxt, entry.msgid), entry)
+    index = None
+    used = set()
+    counts = dict.fromkeys(["translated", "fuzzy", "untranslated", "obsolete"], 0)
+    for pot_entry in template:
+        if pot_entry.obsolete:
+            continue
+        entry = polib.POEntry(
+            msgctxt=pot_entry.msgctxt,
+            msgid=pot_entry.msgid,
+            msgid_plural=pot_entry.msgid_plural,
+            occurrences=list(pot_entry.occurrences),
+            comment=pot_entry.comment,
+            flags=[flag for flag in pot_entry.flags if flag != "fuzzy"],
+        )
+        key = (pot_entry.msgctxt, pot_entry.msgid)
+        match = existing.get(key)
+        is_fuzzy = False
+        if match is not None:
+            used.add(key)
+            entry.tcomment = match.tcomment
+            is_fuzzy = _copy_translation(entry, match, nplurals) or match.fuzzy
+            if match.fuzzy:
+                entry.previous_msgctxt = match.previous_msgctxt
+                entry.previous_msgid = match.previous_msgid
+                entry.previous_msgid_plural = match.previous_msgid_plural
+        elif fuzzy_matching:
+            if index is None:
+                index = FuzzyIndex(e for e in catalog if _is_translated(e))
+            match = index.search(pot_entry.msgid)
+            if match is not None:
+                entry.tcomment = match.tcomment
+                _copy_translation(entry, match, nplurals)
+                is_fuzzy = True
+                if previous:
+                    entry.previous_msgctxt = match.msgctxt
+                    entry.previous_msgid = match.msgid
+                    entry.previous_msgid_plural = match.msgid_plural or None
+        if match is None and entry.msgid_plural:
+            entry.msgstr_plural = dict((i, "") for i in range(nplurals))
+        if is_fuzzy:
+            entry.flags.insert(0, "fuzzy")
+            counts["fuzzy"] += 1
+        elif _is_translated(entry):
+            counts["translated"] += 1
+        else:
+            counts["untranslated"] += 1
+        result.append(entry)
+
+    for entry in list(catalog) + catalog.obsolete_entries():
+        key = (entry.msgctxt, entry.msgid)
+        if key in used or not _is_translated(entry):
+            continue
+        used.add(key)
+        entry.obsolete = True
+        result.append(entry)
+        counts["obsolete"] += 1
+    return (result, counts)
+
+
+def _po_text(catalog):
+    """Return the contents of a PO file. polib writes an empty comment line
+    for a catalog without a header, which is left out here."""
+    text = catalog.__unicode__()
+    if not catalog.header:
+        text = text[len("#\n") :]
+    return text
+
+
+def update_file(template, filename, fuzzy_matching=True, previous=False):
+    """Update a PO file with the messages from a template.
+
+    The file is only rewritten if its contents change. This returns the
+    counts from :py:func:`merge_catalog`, and whether the file was changed.
+    """
+    catalog = polib.pofile(filename)
+    (result, counts) = merge_catalog(template, catalog, fuzzy_matching, previous)
+    with io.open(filename, "rt", encoding=catalog.encoding) as input:
+        old = input.read()
+    new = _po_text(result)
+    if new == old:
+        return (counts, False)
+    (fd, tmpfile) = tempfile.mkstemp(dir=os.path.dirname(filename) or None, text=True)
+    with io.open(fd, "wt", encoding=catalog.encoding) as output:
+        output.write(new)
+    # mkstemp creates files which are only readable by their owner.
+    shutil.copymode(filename, tmpfile)
+    os.rename(tmpfile, filename)
+    return (counts, True)
+
+
+@click.command()
+@click.option(
+    "-N",
+    "--no-fuzzy-matching",
+    "fuzzy_matching",
+    flag_value=False,
+    default=True,
+    help="Do not use fuzzy matching for new messages",
+)
+@click.option(
+    "--previous",
+    is_flag=True,
+    help="Keep the previous msgid of messages marked as fuzzy",
+)
+@click.argument("template", type=click.Path(exists=True, dir_okay=False), metavar="POT")
+@click.argument(
+    "input",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, writable=True),
+    metavar="PO-file",
+)
+def main(fuzzy_matching, previous, template, input):
+    "Update PO files with the messages from a POT file"
+
+    try:
+        template = polib.pofile(template)
+    except (IOError, UnicodeDecodeError) as e:
+        click.echo("Can not read %s: %s" % (template, e), err=True)
+        raise SystemExit(1)
+    for filename in input:
+        try:
+            (counts, changed) = update_file(
+                template, filename, fuzzy_matching, previous
+            )
+        except (IOError, UnicodeDecodeError) as e:
+            click.echo("Can not update %s: %s" % (filename, e), err=True)
+            raise SystemExit(1)
+        click.echo(
+            "%s: %d translated, %d fuzzy, %d untranslated, %d obsolete%s"
+            % (
+                filename,
+                counts["translated"],
+                counts["fuzzy"],
+                counts["untranslated"],
+                counts["obsolete"],
+                "" if changed else " (unchanged)",
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+import contextlib
+import heapq
+import json
+import time
+
+
+class ExtractionStats(object):
+    """Collect timing information for an extraction run.
+
+    Time is recorded per phase, per extractor and per file. Phases can be
+    nested: time spent in a nested phase is not counted for the outer
+    phase. Only the ``slowest`` slowest files are remembered.
+    """
+
+    def __init__(self, slowest=10):
+        self.slowest = slowest
+        self.phases = OrderedDict()
+        self.extractors = OrderedDict()
+        self.files = 0
+        self.cached_files = 0
+        self.skipped_files = 0
+        self.expression_hits = 0
+        self.expression_misses = 0
+        self.messages = 0
+        self.entries = 0
+        self._slowest_files = []
+        self._stack = []
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self._stop(self._stack[-1], now)
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._stop(self._stack.pop(), now)
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def _stop(self, frame, now):
+        (name, start) = frame
+        self.phases[name] = self.phases.get(name, 0.0) + (now - start)
+
+    def timed(self, name, iterable):
+        """Wrap an iterable, counting the time spent getting items as a phase."""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add_file(
+        self, filename, extractor, elapsed, messages, cached=False, skipped=False
+    ):
+        info = self.extractors.get(extractor)
+        if info is None:
+            info = self.extractors[extractor] = {
+                "files": 0,
+                "cached_files": 0,
+                "skipped_files": 0,
+                "messages": 0,
+                "seconds": 0.0,
+            }
+        info["files"] += 1
+        info["messages"] += messages
+        info["seconds"] += elapsed
+        self.files += 1
+        self.messages += messages
+        if cached:
+            info["cached_files"] += 1
+            self.cached_files += 1
+        elif skipped:
+            info["skipped_files"] += 1
+            self.skipped_files += 1
+        if not cached and self.slowest:
+            item = (elapsed, filename)
+            if len(self._slowest_files) < self.slowest:
+                heapq.heappush(self._slowest_files, item)
+            else:
+                heapq.heappushpop(self._slowest_files, item)
+
+    def slowest_files(self):
+        return sorted(self._slowest_files, reverse=True)
+
+    def as_dict(self):
+        return OrderedDict(
+            [
+                ("seconds", time.perf_counter() - self._start),
+                ("phases", self.phases),
+                ("extractors", self.extractors),
+                ("files", self.files),
+                ("cached_files", self.cached_files),
+                ("skipped_files", self.skipped_files),
+                (
+                    "expression_cache",
+                    {"hits": self.expression_hits, "misses": self.expression_misses},
+                ),
+                ("messages", self.messages),
+                ("entries", self.entries),
+                (
+                    "slowest_files",
+                    [
+                        {"filename": filename, "seconds": elapsed}
+                        for (elapsed, filename) in self.slowest_files()
+                    ],
+                ),
+            ]
+        )
+
+    def format_json(self):
+        return json.dumps(self.as_dict())
+
+    def format_text(self):
+        lines = ["%-20s %10s" % ("Phase", "Seconds")]
+        for (name, seconds) in self.phases.items():
+            lines.append("%-20s %10.3f" % (name, seconds))
+        lines.append("%-20s %10.3f" % ("total", time.perf_counter() - self._start))
+        lines.append("")
+        lines.append(
+            "%-20s %8s %8s %8s %10s %10s"
+            % ("Extractor", "Files", "Cached", "Skipped", "Messages", "Seconds")
+        )
+        for (name, info) in self.extractors.items():
+            lines.append(
+                "%-20s %8d %8d %8d %10d %10.3f"
+                % (
+                    name,
+                    info["files"],
+                    info["cached_files"],
+                    info["skipped_files"],
+                    info["messages"],
+                    info["seconds"],
+                )
+            )
+        lines.append("")
+        lines.append(
+            "%d files (%d from cache, %d skipped), %d messages, %d catalog entries"
+            % (
+                self.files,
+                self.cached_files,
+                self.skipped_files,
+                self.messages,
+                self.entries,
+            )
+        )
+        if self.expression_hits or self.expression_misses:
+            lines.append(
+                "Expression cache: %d hits, %d misses"
+                % (self.expression_hits, self.expression_misses)
+            )
+        slowest = self.slowest_files()
+        if slowest:
+            lines.append("")
+            lines.append("Slowest files:")
+            for (elapsed, filename) in slowest:
+                lines.append("%10.3f  %s" % (elapsed, filename))
+        return "\n".join(lines)
@@ -0,0 +1,227 @@
+import os
+import re
+
+
+# Directories used by version control systems, which never contain
+# files we want to scan.
+DEFAULT_EXCLUDES = [".git/", ".hg/", ".svn/", ".bzr/", "CVS/", "__pycache__/"]
+
+
+def translate_pattern(pattern):
+    """Translate a gitignore-style glob pattern to a regular expression.
+
+    The regular expression matches paths relative to the directory the
+    pattern applies to, using ``/`` as separator. Patterns which contain a
+    ``/`` at the start or in the middle are anchored to that directory;
+    other patterns match at any level.
+    """
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    i = 0
+    n = len(pattern)
+    regex = []
+    while i < n:
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == n and pattern[i - 1 : i] == "/":
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            j = pattern.find("]", i + 2)
+            if j == -1:
+                regex.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                chars = pattern[i + 1 : j]
+                if chars[0] == "!":
+                    chars = "^" + chars[1:]
+                regex.append("[%s]" % chars.replace("\\", "\\\\"))
+                i = j + 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return ("" if anchored else "(?:.*/)?") + "".join(regex) + r"\Z"
+
+
+class IgnoreRules(object):
+    """A list of gitignore-style patterns.
+
+    As with gitignore a pattern starting with ``!`` includes paths excluded
+    by an earlier pattern, and a pattern ending with ``/`` only matches
+    directories. The last matching pattern wins.
+    """
+
+    def __init__(self, patterns=()):
+        self.rules = []
+        for pattern in patterns:
+            self.add(pattern)
+
+    @classmethod
+    def from_file(cls, fileobj):
+        rules = cls()
+        for line in fileobj:
+            line = line.rstrip("\r\n").rstrip(" ")
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("\\"):
+                line = line[1:]
+            rules.add(line)
+        return rules
+
+    def add(self, pattern):
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        if not pattern:
+            return
+        regex = re.compile(translate_pattern(pattern))
+        self.rules.append((regex, negate, dir_only))
+
+    def extend(self, rules):
+        self.rules.extend(rules.rules)
+
+    def match(self, path, is_dir=False):
+        """Check if a relative path is excluded."""
+        for (regex, negate, dir_only) in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(path) is not None:
+                return not negate
+        return False
+
+
+class Walker(object):
+    """Find all files in directory trees.
+
+    Excluded directories are skipped without descending into them, and
+    every directory and file is only visited once, even if it can be
+    reached through multiple paths using symlinks. The entries of every
+    directory are remembered, so walking a tree again only needs to list
+    directories whose modification time changed.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else IgnoreRules()
+        self.seen_directories = set()
+        self.seen_files = set()
+        self._listings = {}
+
+    def reset(self):
+        """Forget which directories and files were visited, so the same trees
+        can be walked again."""
+        self.seen_directories = set()
+        self.seen_files = set()
+
+    def walk(self, root):
+        """Generate the paths of all files in a directory tree."""
+        real_root = os.path.realpath(root)
+        if real_root in self.seen_directories:
+            return
+        self.seen_directories.add(real_root)
+        stack = [(root, real_root, "")]
+        while stack:
+            (path, real_path, relpath) = stack.pop()
+            directories = []
+            for (entry_path, entry_real_path, entry_relpath, is_dir) in self._listing(
+                path, real_path, relpath
+            ):
+                if is_dir:
+                    if entry_real_path not in self.seen_directories:
+                        self.seen_directories.add(entry_real_path)
+                        directories.append(
+                            (entry_path, entry_real_path, entry_relpath + "/")
+                        )
+                elif entry_real_path not in self.seen_files:
+                    self.seen_files.add(entry_real_path)
+                    yield entry_path
+            # Visit subdirectories in the order in which they were found.
+            stack.extend(reversed(directories))
+
+    def _listing(self, path, real_path, relpath):
+        """Return the entries of a directory which are not excluded."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        key = (path, relpath)
+        cached = self._listings.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return []
+        listing = []
+        for entry in entries:
+            entry_relpath = relpath + entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if self.rules.match(entry_relpath, is_dir):
+                continue
+            if entry.is_symlink():
+                entry_real_path = os.path.realpath(entry.path)
+            else:
+                entry_real_path = os.path.join(real_path, entry.name)
+            listing.append((entry.path, entry_real_path, entry_relpath, is_dir))
+        self._listings[key] = (mtime, listing)
+        return listing
+
+
+class PathRoutes(object):
+    """Map gitignore-style path patterns to extractor names.
+
+    All patterns are combined into a single regular expression, so the
+    cost of finding the route for a path does not depend on the number of
+    routes. If multiple patterns match a path the first one is used.
+    """
+
+    def __init__(self):
+        self.routes = []
+        self._matcher = None
+
+    def __bool__(self):
+        return bool(self.routes)
+
+    __nonzero__ = __bool__
+
+    def add(self, pattern, extractor):
+        """Add a route. Use an empty extractor name to skip matching files."""
+        if pattern.endswith("/"):
+            pattern += "**"
+        self.routes.append((pattern, extractor))
+        self._matcher = None
+
+    def clear(self):
+        del self.routes[:]
+        self._matcher = None
+
+    def match(self, path):
+        """Return the extractor name for a path.
+
+        The path must be relative to the current directory and use ``/`` as
+        separator. This returns ``None`` if no pattern matches the path.
+        """
+        if not self.routes:
+            return None
+        if self._matcher is None:
+            self._matcher = re.compile(
+                "|".join(
+                    "(%s)" % translate_pattern(pattern)
+                    for (pattern, extractor) in self.routes
+                )
+            )
+        m = self._matcher.match(path)
+        if m is None:
+            return None
+        return self.routes[m.lastindex - 1][1]
@@ -0,0 +1,36 @@
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+import os
+import time
+
+
+def snapshot(filenames):
+    """Return the size and modification time of all existing files."""
+    result = OrderedDict()
+    for filename in filenames:
+        try:
+            st = os.stat(filename)
+        except OSError:
+            continue
+        result[filename] = (st.st_size, st.st_mtime_ns)
+    return result
+
+
+def watch_files(list_files, previous, interval=1.0):
+    """Poll a set of files for changes.
+
+    ``list_files`` is called to get the current list of files, and
+    ``previous`` is the snapshot to compare against. Every time files are
+    added, changed or removed this generates a tuple with the list of all
+    current files and the list of files which need to be scanned again.
+    """
+    while True:
+        time.sleep(interval)
+        current = snapshot(list_files())
+        if current == previous:
+            continue
+        changed = [fn for (fn, info) in current.items() if previous.get(fn) != info]
+        previous = current
+        yield (list(current), changed)
@@ -1,6 +1,10 @@
 from lingua.extractors import check_c_format
 from lingua.extractors import Keyword
+from lingua.extractors import KeywordRegistry
 from lingua.extractors import Extractor
+from lingua.extractors import ExtractorRegistry
+from lingua.extractors import BUILTIN_EXTENSIONS
+import pickle
 import pytest
 
 
@@ -76,6 +80,79 @@ class TestKeywordFromSpec(object):
         assert kw.required_arguments == 5
 
 
+class TestKeywordRegistry(object):
+    def test_mapping(self):
+        registry = KeywordRegistry({"gettext": Keyword("gettext")})
+        assert "gettext" in registry
+        assert registry["gettext"].function == "gettext"
+        assert list(registry) == ["gettext"]
+        assert len(registry) == 1
+
+    def test_immutable(self):
+        keywords = {"gettext": Keyword("gettext")}
+        registry = KeywordRegistry(keywords)
+        keywords["other"] = Keyword("other")
+        assert "other" not in registry
+        with pytest.raises(TypeError):
+            registry.keywords["other"] = Keyword("other")
+        with pytest.raises(AttributeError):
+            registry.keywords = {}
+
+    def test_pattern(self):
+        registry = KeywordRegistry({"gettext": Keyword("gettext")})
+        assert registry.pattern.search(b"x = gettext ('a')")
+        assert registry.pattern.search(b"x = _(\n'a')")
+        assert registry.pattern.search(b"x = gettext  # comment\n('a')")
+        assert not registry.pattern.search(b"x = ngettext('a')")
+        assert not registry.pattern.search(b"x = gettext")
+
+    def test_pickle(self):
+        registry = KeywordRegistry({"gettext": Keyword("gettext", 2)})
+        copy = pickle.loads(pickle.dumps(registry))
+        assert copy["gettext"].msgid_param == 2
+        assert copy.pattern.pattern == registry.pattern.pattern
+
+
 def test_extractor():
     with pytest.raises(TypeError):
         Extractor()
+
+
+class TestExtractorRegistry(object):
+    def test_loader_called_on_first_use(self):
+        calls = []
+
+        def loader():
+            calls.append(True)
+            return "extractor"
+
+        registry = ExtractorRegistry()
+        registry.register_loader("dummy", loader)
+        assert "dummy" in registry
+        assert list(registry) == ["dummy"]
+        assert calls == []
+        assert registry["dummy"] == "extractor"
+        assert registry["dummy"] == "extractor"
+        assert calls == [True]
+
+    def test_unavailable_extractor(self):
+        registry = ExtractorRegistry()
+        registry.register_loader("dummy", lambda: None)
+        assert registry.get("dummy") is None
+        assert "dummy" not in registry
+
+    def test_set_replaces_loader(self):
+        registry = ExtractorRegistry()
+        registry.register_loader("dummy", lambda: "lazy")
+        registry["dummy"] = "eager"
+        assert registry["dummy"] == "eager"
+        assert len(registry) == 1
+
+
+def test_builtin_extensions():
+    import importlib
+
+    for (target, extensions) in BUILTIN_EXTENSIONS.items():
+        (module, name) = target.split(":")
+        extractor = getattr(importlib.import_module(module), name)
+        assert extractor.extensions == extensions
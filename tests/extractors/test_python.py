@@ -5,7 +5,12 @@ except ImportError:
     import mock
 import pytest
 import io
+from lingua.extractors import ExtractionError
+from lingua.extractors.python import KEYWORDS
 from lingua.extractors.python import PythonExtractor
+from lingua.extractors.python import _extract_python
+from lingua.extractors.python import _extract_python_expressions
+from lingua.extractors.python import keyword_registry
 
 
 python_extractor = PythonExtractor()
@@ -27,7 +32,7 @@ def test_syntax_error():
     options = mock.Mock()
     options.keywords = []
     source = u"""def class xya _(u'føo' 1)"""
-    with pytest.raises(SystemExit):
+    with pytest.raises(ExtractionError):
         generator = python_extractor("filename", options)
         list(generator)
 
@@ -209,6 +214,17 @@ def test_domain_filter():
     assert len(messages) == 1
 
 
+@pytest.mark.usefixtures("fake_source")
+def test_message_domain():
+    global source
+    options = mock.Mock()
+    options.keywords = []
+    options.domain = None
+    source = u"""_('one')\ndgettext('mydomain', 'two')"""
+    messages = list(python_extractor("filename", options))
+    assert [m.domain for m in messages] == [None, "mydomain"]
+
+
 @pytest.mark.usefixtures("fake_source")
 def test_dict_argument():
     global source
@@ -255,3 +271,154 @@ def test_bytes_input():
         messages = list(python_extractor("filename", options))
         assert len(messages) == 1
         assert messages[0].msgid == "word"
+
+
+ENGINE_SOURCES = [
+    u"_('word')",
+    u"# comment\n# I18N: tagged\n_('word')\n_('other')",
+    u"x = 1  # I18N: trailing\n\n_('word')",
+    u"_('one'); _('two')  # I18N: same line\n_('three')",
+    u"_('one',  # I18N: inside\n  'two')  # I18N: after\n_('three')",
+    u"# I18N: [fuzzy] flagged\nngettext('one', 'many', n)",
+    u"s = '# not a comment'\n_('word')",
+    u's = """\n# not a comment\n"""\n_("word")',
+    u"foo(_('outer'), bar(_('inner')))",
+    u"_(_('nested'))",
+    u"gettext('one').format(_('two'))",
+    u"obj.gettext('attribute')\nobj._ ('space')",
+    u"from gettext import gettext\n_('after keyword name')\nx = _(gettext('inner'))",
+    u"_('word', mapping={'a': 1}, default=u'Default')",
+    u"_('word', func(1), x.y, x[0], (1, 2), [3], None)",
+    u"_('word', 1)",
+    u"_('word', f(x).y)",
+    u"_(u'msgid', 'domain', u'Default text')",
+    u"pgettext('context', 'word')\ndgettext('domain', 'word')",
+    u"_(('parenthesized'))",
+    u"_(x for x in y)",
+    u"def _(x):\n    return gettext(x)\n\nclass A:\n    label = _(u'Label')",
+    u"print 'python 2'\n_('word')",
+]
+
+
+@pytest.mark.parametrize("comment_tag", [True, "I18N:", None])
+@pytest.mark.parametrize("source", ENGINE_SOURCES)
+def test_ast_engine_same_messages(source, comment_tag):
+    options = mock.Mock()
+    options.keywords = []
+    options.comment_tag = comment_tag
+    options.domain = None
+    expected = list(python_extractor("filename", options, io.StringIO(source)))
+    ast_extractor = PythonExtractor({"engine": "ast"})
+    assert list(ast_extractor("filename", options, io.StringIO(source))) == expected
+
+
+@pytest.mark.parametrize("source", [u"_('word', n=1)", u"_('a' + 'b')"])
+def test_ast_engine_same_errors(source):
+    options = mock.Mock()
+    options.keywords = []
+    ast_extractor = PythonExtractor({"engine": "ast"})
+    with pytest.raises(ExtractionError):
+        list(python_extractor("filename", options, io.StringIO(source)))
+    with pytest.raises(ExtractionError):
+        list(ast_extractor("filename", options, io.StringIO(source)))
+
+
+def test_ast_engine_does_not_tokenize():
+    options = mock.Mock()
+    options.keywords = []
+    ast_extractor = PythonExtractor({"engine": "ast"})
+    with mock.patch("lingua.extractors.python.TokenStreamer") as TokenStreamer:
+        list(ast_extractor("filename", options, io.StringIO(u"_('word')")))
+        assert not TokenStreamer.called
+        list(ast_extractor("filename", options, io.StringIO(u"print 'x'")))
+        assert TokenStreamer.called
+
+
+def test_unknown_engine():
+    options = mock.Mock()
+    options.keywords = []
+    extractor = PythonExtractor({"engine": "other"})
+    with pytest.raises(ExtractionError):
+        extractor("filename", options, io.StringIO(u"_('word')"))
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [
+        (b"", False),
+        (b"import os\nprint(os.sep)\n", False),
+        (b"x = _\n", False),
+        (b"foo_(x)\n", False),
+        (b"_('word')\n", True),
+        (b"self._ ('word')\n", True),
+        (b"gettext  # comment\n('word')\n", True),
+        (b"other('word')\n", True),
+    ],
+)
+def test_may_contain_messages(tmp_path, source, expected):
+    filename = tmp_path.joinpath("module.py")
+    filename.write_bytes(source)
+    options = mock.Mock()
+    options.keywords = ["other"]
+    assert python_extractor.may_contain_messages(str(filename), options) is expected
+
+
+def test_may_contain_messages_missing_file(tmp_path):
+    options = mock.Mock()
+    options.keywords = []
+    filename = str(tmp_path.joinpath("missing.py"))
+    assert python_extractor.may_contain_messages(filename, options)
+
+
+def test_keyword_registry_is_shared():
+    assert keyword_registry(("other",)) is keyword_registry(("other",))
+    assert "other" in keyword_registry(("other",))
+    assert "other" not in keyword_registry()
+    assert list(keyword_registry(("",))) == [""]
+
+
+def test_keywords_are_not_global():
+    options = mock.Mock()
+    options.keywords = ["special"]
+    messages = list(python_extractor("filename", options, io.StringIO(u"special('a')")))
+    assert len(messages) == 1
+    assert "special" not in KEYWORDS
+    options.keywords = []
+    messages = list(python_extractor("filename", options, io.StringIO(u"special('a')")))
+    assert messages == []
+
+
+EXPRESSIONS = [
+    (u"_('one') # I18N: comment", 3),
+    (u"_('two')", 3),
+    (u"  _(\n  'three')", 5),
+    (u"# I18N: not carried over", 8),
+    (u"_('four')", 9),
+    (u"_", 9),
+    (u"(x, ngettext('five', 'many', n))", 12),
+]
+
+
+@pytest.mark.parametrize("comment_tag", [True, "I18N:", None])
+def test_expressions_same_messages(comment_tag):
+    options = mock.Mock()
+    options.keywords = []
+    options.comment_tag = comment_tag
+    options.domain = None
+    expected = [
+        list(_extract_python("filename", source, options, firstline))
+        for (source, firstline) in EXPRESSIONS
+    ]
+    assert _extract_python_expressions("filename", EXPRESSIONS, options) == expected
+
+
+def test_expressions_error_location():
+    options = mock.Mock()
+    options.keywords = []
+    expressions = [(u"_('one')", 3), (u"_(\n'two', 1, 2)", 10)]
+    with pytest.raises(ExtractionError) as e:
+        _extract_python_expressions("filename", expressions, options)
+    assert str(e.value) == "Parse error in filename[12]: Unexpected )"
+    with pytest.raises(ExtractionError) as e:
+        _extract_python("filename", expressions[1][0], options, 10)
+    assert str(e.value) == "Parse error in filename[12]: Unexpected )"
@@ -5,6 +5,9 @@ except ImportError:
     import mock
 import pytest
 from io import BytesIO
+from lingua.cache import ExpressionCache
+from lingua.extractors import ExtractionError
+from lingua.extractors import python
 from lingua.extractors.xml import ChameleonExtractor
 from lingua.extractors.xml import get_python_expressions
 
@@ -35,7 +38,7 @@ def fake_source(request):
 def test_abort_on_syntax_error():
     global source
     source = b"""\xff\xff\xff"""
-    with pytest.raises(SystemExit):
+    with pytest.raises(ExtractionError):
         list(xml_extractor("filename", _options()))
 
 
@@ -60,6 +63,25 @@ def test_attributes_plain():
     assert len(messages) == 1
     assert messages[0].msgid == u"tést title"
     assert messages[0].location[1] == 3
+    assert messages[0].domain == "lingua"
+
+
+@pytest.mark.usefixtures("fake_source")
+def test_message_domain():
+    global source
+    source = b"""<html xmlns:i18n="http://xml.zope.org/namespaces/i18n"
+                       i18n:domain="lingua">
+                  <p i18n:translate="">Text</p>
+                  <p tal:content="_('Expression')"/>
+                  <p tal:content="dgettext('other', 'Explicit')"/>
+                </html>
+                """
+    messages = list(xml_extractor("filename", _options()))
+    assert [(m.msgid, m.domain) for m in messages] == [
+        ("Text", "lingua"),
+        ("Expression", None),
+        ("Explicit", "other"),
+    ]
 
 
 @pytest.mark.usefixtures("fake_source")
@@ -510,6 +532,65 @@ def test_translate_entities_in_python_expression():
     list(xml_extractor("filename", _options()))
 
 
+@pytest.mark.usefixtures("fake_source")
+def test_python_expressions_tokenized_once():
+    global source
+    source = b"""\
+                <html xmlns:i18n="http://xml.zope.org/namespaces/i18n"
+                      xmlns:tal="http://xml.zope.org/namespaces/tal"
+                      i18n:domain="lingua">
+                  <p title="${_('one')}">${_('two')}</p>
+                  <p i18n:translate="">three</p>
+                  <p tal:content="_('four')"
+                     i18n:domain="other">${_('five')}</p>
+                </html>
+                """
+    with mock.patch(
+        "lingua.extractors.xml.expression_cache", ExpressionCache()
+    ), mock.patch(
+        "lingua.extractors.python.TokenStreamer",
+        wraps=python.TokenStreamer,
+    ) as TokenStreamer:
+        messages = list(xml_extractor("filename", _options()))
+    assert TokenStreamer.call_count == 1
+    assert [(m.msgid, m.domain) for m in messages] == [
+        ("one", None),
+        ("two", "lingua"),
+        ("three", "lingua"),
+        ("four", None),
+        ("five", "other"),
+    ]
+
+
+@pytest.mark.usefixtures("fake_source")
+def test_python_expressions_are_cached():
+    global source
+    options = _options(comment_tag=True)
+    cache = ExpressionCache()
+    with mock.patch("lingua.extractors.xml.expression_cache", cache):
+        source = b"""\
+                <html>
+                  <p>${_('one') # comment}</p><p>${_('one')}</p>
+                </html>
+                """
+        first = list(xml_extractor("filename", options))
+        source = b"""\
+                <html>
+
+                  <p>${_('one') # comment}</p>
+                </html>
+                """
+        second = list(xml_extractor("filename", options))
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert [(m.msgid, m.comment, m.location) for m in first] == [
+        ("one", "comment", ("filename", 5)),
+        ("one", "", ("filename", 5)),
+    ]
+    assert [(m.msgid, m.comment, m.location) for m in second] == [
+        ("one", "comment", ("filename", 7)),
+    ]
+
+
 @pytest.mark.usefixtures("fake_source")
 def test_curly_brace_in_python_expression():
     global source
@@ -540,7 +621,7 @@ def test_curly_brace_related_syntax_error():
               <a href="${request.route_url('set_locale', _}"></a>
             </html>
             """
-    with pytest.raises(SystemExit):
+    with pytest.raises(ExtractionError):
         list(xml_extractor("filename", _options()))
 
 
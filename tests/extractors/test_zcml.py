@@ -4,6 +4,7 @@ except ImportError:
     import mock
 import pytest
 from io import BytesIO
+from lingua.extractors import ExtractionError
 from lingua.extractors.zcml import ZCMLExtractor
 
 
@@ -58,6 +59,7 @@ def test_i18n_with_domain():
     messages = list(zcml_extractor("filename", _options()))
     assert len(messages) == 1
     assert messages[0].msgid == u"test title"
+    assert messages[0].domain == "lingua"
 
 
 @pytest.mark.usefixtures("fake_source")
@@ -95,5 +97,5 @@ def test_domain_nesting():
 def test_abort_on_syntax_error():
     global source
     source = b"""<configure"""
-    with pytest.raises(SystemExit):
+    with pytest.raises(ExtractionError):
         list(zcml_extractor("filename", _options()))
@@ -0,0 +1,141 @@
+import os
+from lingua.cache import ExpressionCache
+from lingua.cache import ExtractionCache
+from lingua.extract import ExtractorOptions
+from lingua.extractors import Message
+from lingua.extractors.python import PythonExtractor
+
+
+def _options(**kw):
+    settings = {"comment_tag": True, "domain": None, "keywords": []}
+    settings.update(kw)
+    return ExtractorOptions(**settings)
+
+
+MESSAGES = [
+    Message(None, u"msgid", None, ["c-format"], u"", u"", ("source.py", 1)),
+]
+
+
+class TestExtractionCache:
+    def make_source(self, tmp_path):
+        source = tmp_path.joinpath("source.py")
+        source.write_text(u"_('msgid')\n")
+        return str(source)
+
+    def test_miss_for_unknown_file(self, tmp_path):
+        source = self.make_source(tmp_path)
+        cache = ExtractionCache(str(tmp_path.joinpath("cache.json")))
+        assert cache.get(cache.key(source, PythonExtractor(), _options())) is None
+        assert cache.misses == 1
+
+    def test_roundtrip(self, tmp_path):
+        source = self.make_source(tmp_path)
+        cache_file = str(tmp_path.joinpath("cache.json"))
+        cache = ExtractionCache(cache_file)
+        cache.set(cache.key(source, PythonExtractor(), _options()), MESSAGES)
+        cache.save()
+        cache = ExtractionCache(cache_file)
+        messages = cache.get(cache.key(source, PythonExtractor(), _options()))
+        assert messages == MESSAGES
+        assert isinstance(messages[0].location, tuple)
+        assert cache.hits == 1
+
+    def test_changed_file_is_a_miss(self, tmp_path):
+        source = self.make_source(tmp_path)
+        cache = ExtractionCache(str(tmp_path.joinpath("cache.json")))
+        cache.set(cache.key(source, PythonExtractor(), _options()), MESSAGES)
+        st = os.stat(source)
+        with open(source, "w") as output:
+            output.write("_('other')\n")
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+        assert cache.get(cache.key(source, PythonExtractor(), _options())) is None
+
+    def test_touched_file_is_a_hit(self, tmp_path):
+        source = self.make_source(tmp_path)
+        cache_file = str(tmp_path.joinpath("cache.json"))
+        cache = ExtractionCache(cache_file)
+        cache.set(cache.key(source, PythonExtractor(), _options()), MESSAGES)
+        cache.save()
+        st = os.stat(source)
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+        cache = ExtractionCache(cache_file)
+        assert cache.get(cache.key(source, PythonExtractor(), _options())) == MESSAGES
+        # The new modification time is remembered, so the file does not need
+        # to be read again.
+        cache.save()
+        cache = ExtractionCache(cache_file)
+        cache._digest = None
+        assert cache.get(cache.key(source, PythonExtractor(), _options())) == MESSAGES
+
+    def test_changed_options_is_a_miss(self, tmp_path):
+        source = self.make_source(tmp_path)
+        cache = ExtractionCache(str(tmp_path.joinpath("cache.json")))
+        cache.set(cache.key(source, PythonExtractor(), _options()), MESSAGES)
+        key = cache.key(source, PythonExtractor(), _options(keywords=["foo"]))
+        assert cache.get(key) is None
+        key = cache.key(source, PythonExtractor({"foo": "bar"}), _options())
+        assert cache.get(key) is None
+
+    def test_ignore_corrupt_cache(self, tmp_path):
+        cache_file = tmp_path.joinpath("cache.json")
+        cache_file.write_text(u"garbage")
+        cache = ExtractionCache(str(cache_file))
+        assert cache.entries == {}
+
+    def test_save_drops_removed_files(self, tmp_path):
+        source = self.make_source(tmp_path)
+        cache_file = str(tmp_path.joinpath("cache.json"))
+        cache = ExtractionCache(cache_file)
+        cache.set(cache.key(source, PythonExtractor(), _options()), MESSAGES)
+        os.unlink(source)
+        cache.save()
+        assert ExtractionCache(cache_file).entries == {}
+
+
+EXPRESSION_MESSAGES = [
+    Message(None, u"msgid", None, ["c-format"], u"", u"", (None, 1), u"domain"),
+]
+
+
+class TestExpressionCache:
+    def test_hits_and_misses(self):
+        cache = ExpressionCache()
+        signature = cache.signature(_options())
+        assert cache.get(signature, u"_('msgid')") is None
+        cache.set(signature, u"_('msgid')", EXPRESSION_MESSAGES)
+        assert cache.get(signature, u"_('msgid')") == EXPRESSION_MESSAGES
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_changed_options_is_a_miss(self):
+        cache = ExpressionCache()
+        cache.set(cache.signature(_options()), u"_('msgid')", EXPRESSION_MESSAGES)
+        for options in [
+            _options(keywords=["foo"]),
+            _options(domain="other"),
+            _options(comment_tag=None),
+        ]:
+            assert cache.get(cache.signature(options), u"_('msgid')") is None
+
+    def test_least_recently_used_entry_is_dropped(self):
+        cache = ExpressionCache(maxsize=2)
+        cache.set("sig", u"one", [])
+        cache.set("sig", u"two", [])
+        cache.get("sig", u"one")
+        cache.set("sig", u"three", [])
+        assert cache.get("sig", u"two") is None
+        assert cache.get("sig", u"one") == []
+        assert cache.get("sig", u"three") == []
+
+    def test_persist_in_extraction_cache(self, tmp_path):
+        cache_file = str(tmp_path.joinpath("cache.json"))
+        cache = ExpressionCache()
+        cache.set("sig", u"_('msgid')", EXPRESSION_MESSAGES)
+        extraction_cache = ExtractionCache(cache_file)
+        extraction_cache.expressions = cache.dump()
+        extraction_cache.save()
+        cache = ExpressionCache()
+        cache.load(ExtractionCache(cache_file).expressions)
+        messages = cache.get("sig", u"_('msgid')")
+        assert messages == EXPRESSION_MESSAGES
+        assert isinstance(messages[0].location, tuple)
@@ -1,8 +1,34 @@
+from collections import OrderedDict
+import io
+import json
 import polib
+import pytest
+from click.testing import CliRunner
+from lingua.cache import expression_cache
+from lingua.extract import CompactCatalog
+from lingua.extract import DomainCatalogs
+from lingua.extract import extract
+from lingua.extract import extract_messages
+from lingua.extract import ExtractorOptions
+from lingua.extract import main
+from lingua.extractors import ExtractionError
+from lingua.extractors import Message
 from lingua.extract import POEntry
 from lingua.extract import POFile
 from lingua.extract import identical
 from lingua.extract import strip_linenumbers
+from lingua.extract import write_catalog
+from lingua.extract import create_catalog
+from lingua.extract import catalog_fingerprint
+from lingua.extract import read_fingerprint
+from lingua.extract import save_catalog
+from lingua.extract import list_files
+from lingua.extract import read_config
+from lingua.extractors import EXTENSIONS
+from lingua.extractors import EXTRACTORS
+from lingua.extractors import PATHS
+from lingua.extractors import get_extractor
+from lingua.extractors import register_extractors
 
 
 STRIPPED_LINENUMBERS_PO = """\
@@ -67,3 +93,655 @@ class Test_identical:
         for entry in a:
             strip_linenumbers(entry)
         assert identical(a, b)
+
+
+class Test_write_catalog:
+    def test_same_as_polib(self):
+        catalog = create_catalog(40, u"Acme", u"package", u"1.0", None)
+        catalog.append(POEntry(msgid=u"id", occurrences=[("file.py", "1")]))
+        catalog.append(
+            POEntry(
+                msgid=u"A rather long message which needs to be wrapped",
+                msgctxt=u"form",
+            )
+        )
+        catalog[-1]._comments.append(u"Comment")
+        catalog.append(POEntry(msgid=u"old", obsolete=True))
+        output = io.StringIO()
+        write_catalog(catalog, output)
+        assert output.getvalue() == catalog.__unicode__()
+
+
+class Test_save_catalog:
+    def make_catalog(self, msgid=u"id"):
+        catalog = create_catalog(79, None, u"package", u"1.0", None)
+        catalog.append(POEntry(msgid=msgid, occurrences=[("file.py", "1")]))
+        return catalog
+
+    def test_fingerprint_ignores_creation_date(self):
+        a = self.make_catalog()
+        b = self.make_catalog()
+        b.metadata["POT-Creation-Date"] = u"2000-01-01 00:00+0000"
+        assert catalog_fingerprint(a) == catalog_fingerprint(b)
+        b.metadata["Project-Id-Version"] = u"package 2.0"
+        assert catalog_fingerprint(a) != catalog_fingerprint(b)
+
+    def test_fingerprint_stored_in_header(self, tmp_path):
+        output = str(tmp_path.joinpath("messages.pot"))
+        catalog = self.make_catalog()
+        save_catalog(catalog, output)
+        assert read_fingerprint(output) == catalog_fingerprint(catalog)
+        assert len(polib.pofile(output)) == 1
+
+    def test_do_not_replace_unchanged_file(self, tmp_path, capsys):
+        output = tmp_path.joinpath("messages.pot")
+        save_catalog(self.make_catalog(), str(output))
+        output.write_text(output.read_text() + u"# marker\n")
+        save_catalog(self.make_catalog(), str(output))
+        assert "No changes found" in capsys.readouterr().out
+        assert output.read_text().endswith(u"# marker\n")
+        assert [path.name for path in tmp_path.iterdir()] == ["messages.pot"]
+
+    def test_replace_changed_file(self, tmp_path):
+        output = tmp_path.joinpath("messages.pot")
+        save_catalog(self.make_catalog(), str(output))
+        save_catalog(self.make_catalog(u"other"), str(output))
+        assert polib.pofile(str(output))[0].msgid == u"other"
+
+    def test_entries_generated_once(self, tmp_path):
+        class Catalog(CompactCatalog):
+            iterations = 0
+
+            def __iter__(self):
+                Catalog.iterations += 1
+                return CompactCatalog.__iter__(self)
+
+        catalog = Catalog(create_catalog(79, None, "package", "1.0", None))
+        catalog.merge([Message(None, u"id", None, [], u"", u"", ("a.py", 1))])
+        save_catalog(catalog, str(tmp_path.joinpath("messages.pot")))
+        assert Catalog.iterations == 1
+
+    def test_file_without_fingerprint(self, tmp_path, capsys):
+        output = tmp_path.joinpath("messages.pot")
+        output.write_text(self.make_catalog().__unicode__())
+        save_catalog(self.make_catalog(), str(output))
+        assert "No changes found" in capsys.readouterr().out
+
+
+class Test_extract:
+    def options(self):
+        return ExtractorOptions(comment_tag=True, domain=None, keywords=[])
+
+    def test_extract_messages(self, tmp_path):
+        tmp_path.joinpath("module.py").write_text(u"_(u'one')\n_(u'two')\n")
+        messages = list(extract_messages([str(tmp_path)], self.options()))
+        assert [m.msgid for m in messages] == [u"one", u"two"]
+
+    def test_extract_catalog(self, tmp_path):
+        tmp_path.joinpath("module.py").write_text(u"_(u'one')\n_(u'one')\n")
+        catalog = extract([str(tmp_path)], self.options(), linenumbers=False)
+        assert len(catalog) == 1
+        assert catalog[0].occurrences == [(str(tmp_path.joinpath("module.py")), "")]
+
+    def test_parse_error_raises_exception(self, tmp_path):
+        tmp_path.joinpath("module.py").write_text(u"_(u'one' 1)\n")
+        with pytest.raises(ExtractionError):
+            extract([str(tmp_path)], self.options())
+
+    def test_missing_file_raises_exception(self, tmp_path):
+        with pytest.raises(ExtractionError):
+            list(
+                extract_messages(
+                    ["module.py"], self.options(), directory=[str(tmp_path)]
+                )
+            )
+
+
+class TestExtractorOptions:
+    def test_keyword_registry(self):
+        options = ExtractorOptions(comment_tag=True, domain=None, keywords=["foo:2"])
+        registry = options.keyword_registry
+        assert registry["foo"].msgid_param == 2
+        assert "gettext" in registry
+        assert options.keyword_registry is registry
+
+
+class Test_read_config:
+    @pytest.fixture(autouse=True)
+    def registry(self):
+        register_extractors()
+        extensions = dict(EXTENSIONS)
+        yield
+        PATHS.clear()
+        EXTENSIONS.clear()
+        EXTENSIONS.update(extensions)
+
+    def test_paths(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        read_config(
+            io.StringIO(
+                u"[paths]\n"
+                u"templates/**/*.html = chameleon\n"
+                u"legacy/ = none\n"
+                u"*.HTML = xml\n"
+            )
+        )
+        assert get_extractor("templates/a/b.html") is not None
+        assert get_extractor("./templates/b.html") is not None
+        assert get_extractor("static/b.html") is None
+        assert get_extractor("static/B.HTML") is not None
+        assert get_extractor("legacy/module.py") is None
+        assert get_extractor("src/module.py") is not None
+
+    def test_paths_unknown_extractor(self):
+        with pytest.raises(ExtractionError):
+            read_config(io.StringIO(u"[paths]\n*.html = bogus\n"))
+
+    @pytest.mark.parametrize(
+        "config",
+        [
+            u"[extensions]\n.foo = missing\n",
+            u"[paths]\n*.foo = missing\n",
+            u"[extractor:missing]\noption = value\n",
+        ],
+    )
+    def test_unavailable_extractor(self, config):
+        EXTRACTORS.register_loader("missing", lambda: None)
+        with pytest.raises(ExtractionError):
+            read_config(io.StringIO(config))
+        assert "missing" not in EXTRACTORS
+
+    def test_extensions_are_case_insensitive(self):
+        read_config(io.StringIO(u"[extensions]\n.HTML = xml\n"))
+        assert EXTENSIONS[".html"] == "xml"
+
+    def test_list_files_uses_paths(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        for path in ["templates/a.html", "static/b.html", "legacy/c.py", "d.py"]:
+            tmp_path.joinpath(path).parent.mkdir(exist_ok=True)
+            tmp_path.joinpath(path).write_text(u"")
+        read_config(
+            io.StringIO(u"[paths]\ntemplates/*.html = chameleon\nlegacy/ = none\n")
+        )
+        assert sorted(list_files(None, ["."])) == [
+            "./d.py",
+            "./templates/a.html",
+        ]
+
+
+class Test_extract_workers:
+    @pytest.fixture(autouse=True)
+    def registry(self):
+        register_extractors()
+        yield
+        register_extractors()
+
+    def test_workers_use_configuration(self, tmp_path):
+        tmp_path.joinpath("page.pt").write_text(
+            u'<p xmlns:tal="http://xml.zope.org/namespaces/tal"'
+            u" tal:content=\"_('Tales')\">${python:_('Python')}</p>\n"
+        )
+        read_config(io.StringIO(u"[extractor:xml]\ndefault-engine = tales\n"))
+        options = ExtractorOptions(comment_tag=True, domain=None, keywords=[])
+        serial = [m.msgid for m in extract_messages([str(tmp_path)], options)]
+        parallel = [m.msgid for m in extract_messages([str(tmp_path)], options, jobs=2)]
+        assert serial == parallel == [u"Python"]
+
+    def test_workers_report_configuration_errors(self, tmp_path):
+        tmp_path.joinpath("module.py").write_text(u"_(u'Message')\n")
+        read_config(io.StringIO(u"[extractor:python]\nengine = bogus\n"))
+        options = ExtractorOptions(comment_tag=True, domain=None, keywords=[])
+        for jobs in [1, 2]:
+            with pytest.raises(ExtractionError):
+                list(extract_messages([str(tmp_path)], options, jobs=jobs))
+
+
+class TestCompactCatalog:
+    MESSAGES = [
+        Message(None, u"one", None, [], u"", u"", ("b.py", 3)),
+        Message(None, u"two", None, [u"c-format"], u"Note", u"", ("a.py", 1)),
+        Message(u"ctx", u"one", None, [], u"", u"", ("a.py", 2)),
+        Message(None, u"one", None, [], u"Other", u"", ("a.py", 4)),
+        Message(None, u"cow", u"cows", [], u"", u"T", ("a.py", 5)),
+        Message(None, u"two", None, [u"fuzzy", u"c-format"], u"", u"", ("a.py", 1)),
+        Message(None, u"one", None, [], u"", u"", ("b.py", 7)),
+    ]
+
+    def write(self, catalog):
+        output = io.StringIO()
+        write_catalog(catalog, output)
+        return output.getvalue()
+
+    def pofile(self, sort_order, linenumbers, add_occurrences):
+        # Merge the messages into a POFile like pot-create used to.
+        catalog = create_catalog(79, None, "package", "1.0", None)
+        for message in self.MESSAGES:
+            entry = catalog.find(message.msgid, msgctxt=message.msgctxt)
+            if entry is None:
+                entry = POEntry(msgctxt=message.msgctxt, msgid=message.msgid)
+                if message.msgid_plural:
+                    entry.msgid_plural = message.msgid_plural
+                    entry.msgstr_plural[0] = ""
+                    entry.msgstr_plural[1] = ""
+                catalog.append(entry)
+            entry.update(message, add_occurrences=add_occurrences)
+        if sort_order == "msgid":
+            catalog.sort(key=lambda entry: entry.msgid)
+        elif sort_order == "location":
+            catalog.sort(
+                key=lambda entry: sorted(
+                    (path, int(line)) for (path, line) in entry.occurrences
+                )
+            )
+        if not linenumbers:
+            for entry in catalog:
+                strip_linenumbers(entry)
+        return catalog
+
+    def catalogs(self, sort_order, linenumbers, add_occurrences=True):
+        catalog = self.pofile(sort_order, linenumbers, add_occurrences)
+        compact = CompactCatalog(
+            create_catalog(79, None, "package", "1.0", None),
+            add_occurrences,
+            linenumbers,
+        )
+        compact.merge(self.MESSAGES)
+        compact.finish(sort_order)
+        return (catalog, compact)
+
+    @pytest.mark.parametrize("sort_order", [None, "msgid", "location"])
+    @pytest.mark.parametrize("linenumbers", [True, False])
+    def test_same_output_as_pofile(self, sort_order, linenumbers):
+        (catalog, compact) = self.catalogs(sort_order, linenumbers)
+        assert self.write(compact) == self.write(catalog)
+        assert catalog_fingerprint(compact) == catalog_fingerprint(catalog)
+
+    def test_without_occurrences(self):
+        (catalog, compact) = self.catalogs(None, True, add_occurrences=False)
+        assert self.write(compact) == self.write(catalog)
+
+    def test_many_distinct_comments(self):
+        compact = CompactCatalog(create_catalog(79, None, "package", "1.0", None))
+        compact.merge(
+            Message(None, u"Save", None, [], u"Comment %d" % i, u"", ("a.pt", i))
+            for i in list(range(100)) * 2
+        )
+        entry = next(iter(compact))
+        assert entry._comments == [u"Comment %d" % i for i in range(100)]
+        assert len(entry.occurrences) == 200
+
+    def locations(self, compact):
+        return [(e.msgid, e.occurrences, e.comment) for e in compact]
+
+    def test_max_locations(self):
+        compact = CompactCatalog(
+            create_catalog(79, None, "package", "1.0", None), max_locations=2
+        )
+        compact.merge(self.MESSAGES)
+        assert self.locations(compact)[0] == (
+            u"one",
+            [("b.py", "3"), ("a.py", "4")],
+            u"\nOther",
+        )
+
+    def test_count_locations(self):
+        compact = CompactCatalog(
+            create_catalog(79, None, "package", "1.0", None),
+            max_locations=1,
+            count_locations=True,
+        )
+        compact.merge(self.MESSAGES)
+        assert self.locations(compact)[:2] == [
+            (u"one", [("b.py", "3")], u"Other\n2 more locations not listed"),
+            (u"two", [("a.py", "1")], u"Note\n1 more location not listed"),
+        ]
+
+    def test_no_linenumbers_deduplicates_while_merging(self):
+        compact = CompactCatalog(
+            create_catalog(79, None, "package", "1.0", None),
+            linenumbers=False,
+            max_locations=2,
+        )
+        compact.merge(
+            Message(None, u"Save", None, [], u"", u"", (path, line))
+            for (path, line) in [("a.pt", 1), ("a.pt", 2), ("b.pt", 1), ("c.pt", 1)]
+        )
+        assert compact.entries[0].locations == ["a.pt", 1, "b.pt", 1]
+        assert compact.entries[0].omitted == 1
+        assert self.locations(compact) == [
+            (u"Save", [("a.pt", ""), ("b.pt", "")], u"")
+        ]
+
+    def test_paths_are_shared(self):
+        compact = CompactCatalog(create_catalog(79, None, "package", "1.0", None))
+        compact.merge(
+            [
+                Message(None, u"one", None, [], u"", u"", (u"".join("a.py"), 1)),
+                Message(None, u"two", None, [], u"", u"", (u"".join("a.py"), 2)),
+            ]
+        )
+        assert compact.entries[0].locations[0] is compact.entries[1].locations[0]
+
+    def test_to_pofile(self):
+        (catalog, compact) = self.catalogs("msgid", True)
+        pofile = compact.to_pofile()
+        assert len(pofile) == 4
+        assert pofile.find(u"one", msgctxt=u"ctx").occurrences == [("a.py", "2")]
+        assert len(compact.pofile) == 0
+
+
+class TestDomainCatalogs:
+    def message(self, msgid, domain):
+        return Message(None, msgid, None, [], u"", u"", ("file.py", 1), domain)
+
+    def test_single_catalog(self):
+        catalogs = DomainCatalogs(POFile)
+        catalogs.add([self.message(u"one", "a"), self.message(u"two", "b")])
+        assert list(catalogs.catalogs) == [None]
+        assert len(catalogs.catalogs[None]) == 2
+
+    def test_split_domains(self):
+        catalogs = DomainCatalogs(POFile, split_domains=True)
+        catalogs.add(
+            [
+                self.message(u"common", None),
+                self.message(u"one", "a"),
+                self.message(u"two", "b"),
+                self.message(u"late", None),
+            ]
+        )
+        result = dict(
+            (domain, [e.msgid for e in catalog])
+            for (domain, catalog) in catalogs.items()
+        )
+        assert result == {
+            "a": [u"common", u"one", u"late"],
+            "b": [u"common", u"two", u"late"],
+        }
+
+    def test_reject_invalid_domain(self):
+        catalogs = DomainCatalogs(POFile, split_domains=True)
+        with pytest.raises(ExtractionError):
+            catalogs.add([self.message(u"one", "../a")])
+
+
+def _strip_creation_date(pot):
+    return "\n".join(
+        line for line in pot.splitlines() if "POT-Creation-Date" not in line
+    )
+
+
+def _write_sources(tmp_path, count=10):
+    for i in range(count):
+        tmp_path.joinpath("module%d.py" % i).write_text(
+            u"_(u'Message %d')\n_(u'Shared')\n" % i
+        )
+
+
+class Test_main:
+    def run(self, *args):
+        result = CliRunner().invoke(main, list(args))
+        assert result.exit_code == 0, result.output
+        return result
+
+    def test_parallel_output_matches_serial(self, tmp_path):
+        _write_sources(tmp_path)
+        serial = tmp_path.joinpath("serial.pot")
+        parallel = tmp_path.joinpath("parallel.pot")
+        self.run("-o", str(serial), str(tmp_path))
+        self.run("-j", "2", "-o", str(parallel), str(tmp_path))
+        assert _strip_creation_date(serial.read_text()) == _strip_creation_date(
+            parallel.read_text()
+        )
+
+    def test_split_domains(self, tmp_path):
+        source = tmp_path.joinpath("src")
+        source.mkdir()
+        source.joinpath("module.py").write_text(
+            u"_(u'common')\ndgettext('a', u'one')\ndgettext('b', u'two')\n"
+        )
+        self.run("-o", str(tmp_path.joinpath("locale", "{domain}.pot")), str(source))
+        a = polib.pofile(str(tmp_path.joinpath("locale", "a.pot")))
+        b = polib.pofile(str(tmp_path.joinpath("locale", "b.pot")))
+        assert [e.msgid for e in a] == [u"common", u"one"]
+        assert [e.msgid for e in b] == [u"common", u"two"]
+
+    def test_domain_option_with_domain_template(self, tmp_path):
+        source = tmp_path.joinpath("module.py")
+        source.write_text(u"_(u'common')\ndgettext('a', u'one')\n")
+        output = str(tmp_path.joinpath("locale", "{domain}.pot"))
+        self.run("-d", "a", "-o", output, str(source))
+        a = polib.pofile(str(tmp_path.joinpath("locale", "a.pot")))
+        assert [e.msgid for e in a] == [u"common", u"one"]
+
+    def test_split_domains_without_domains(self, tmp_path):
+        source = tmp_path.joinpath("module.py")
+        source.write_text(u"_(u'common')\n")
+        output = str(tmp_path.joinpath("locale", "{domain}.pot"))
+        result = CliRunner().invoke(main, ["-o", output, str(source)])
+        assert result.exit_code == 2
+        assert "Use --domain" in result.stderr
+        assert "No translatable strings" not in result.stderr
+
+    def test_split_domains_match_domain_option(self, tmp_path):
+        source = tmp_path.joinpath("src")
+        source.mkdir()
+        source.joinpath("module.py").write_text(
+            u"_(u'Python')\ndgettext('a', u'Python A')\ndgettext('b', u'Python B')\n"
+        )
+        source.joinpath("page.pt").write_text(
+            u"""\
+<html xmlns:i18n="http://xml.zope.org/namespaces/i18n"
+      xmlns:tal="http://xml.zope.org/namespaces/tal">
+  <p title="Outside" i18n:attributes="title">${_(u'Outside expr')}</p>
+  <div i18n:domain="a">
+    <p i18n:translate="">Text A</p>
+    <p title="Title A" i18n:attributes="title" alt="${_(u'Attr expr in A')}">
+      ${_(u'Text expr in A')}
+    </p>
+    <p>${dgettext('b', u'Text B in A') + _(u'Plain')}</p>
+    <p tal:content="dgettext('b', u'Content B in A')">x</p>
+  </div>
+  <div i18n:domain="b"><p i18n:translate="">Text B</p></div>
+</html>
+"""
+        )
+        source.joinpath("configure.zcml").write_text(
+            u'<configure i18n_domain="b"><page title="Zcml B"/></configure>\n'
+        )
+        locale = tmp_path.joinpath("locale")
+        self.run("-o", str(locale.joinpath("{domain}.pot")), str(source))
+        assert sorted(path.name for path in locale.iterdir()) == ["a.pot", "b.pot"]
+        for domain in ["a", "b"]:
+            single = tmp_path.joinpath("%s.pot" % domain)
+            self.run("-d", domain, "-o", str(single), str(source))
+            split = locale.joinpath("%s.pot" % domain)
+            assert _strip_creation_date(split.read_text()) == _strip_creation_date(
+                single.read_text()
+            )
+        b = [e.msgid for e in polib.pofile(str(locale.joinpath("b.pot")))]
+        assert u"Attr expr in A" in b
+        assert u"Outside" not in b
+
+    def test_invalid_jobs(self, tmp_path):
+        result = CliRunner().invoke(main, ["-j", "0", str(tmp_path)])
+        assert result.exit_code == 2
+
+    def test_cached_output_matches(self, tmp_path):
+        _write_sources(tmp_path)
+        cache = str(tmp_path.joinpath("cache.json"))
+        first = tmp_path.joinpath("first.pot")
+        second = tmp_path.joinpath("second.pot")
+        self.run("--cache", cache, "-o", str(first), str(tmp_path))
+        self.run("--cache", cache, "-o", str(second), str(tmp_path))
+        assert _strip_creation_date(first.read_text()) == _strip_creation_date(
+            second.read_text()
+        )
+
+    def test_extractor_found_once_per_file(self, tmp_path, monkeypatch):
+        source = tmp_path.joinpath("src")
+        source.mkdir()
+        _write_sources(source, 3)
+        calls = []
+
+        def get_extractor_name(filename):
+            calls.append(filename)
+            return get_extractor(filename) and "python"
+
+        monkeypatch.setattr("lingua.extract.get_extractor_name", get_extractor_name)
+        args = ["--cache", str(tmp_path.joinpath("cache.json")), "--stats"]
+        self.run(*args + ["-o", str(tmp_path.joinpath("out.pot")), str(source)])
+        assert len(calls) == 3
+
+    def test_cache_ignores_modification_time(self, tmp_path):
+        source = tmp_path.joinpath("src")
+        source.mkdir()
+        _write_sources(source, 4)
+        args = ["--cache", str(tmp_path.joinpath("cache.json")), "--stats"]
+        args += ["-o", str(tmp_path.joinpath("out.pot")), str(source)]
+        self.run(*args)
+        # A fresh checkout changes the modification time of every file.
+        for path in source.iterdir():
+            path.touch()
+        assert "4 files (4 from cache, 0 skipped)" in self.run(*args).stderr
+
+    def test_cache_stores_template_expressions(self, tmp_path):
+        tmp_path.joinpath("page.pt").write_text(u"<p>${_(u'Expression')}</p>\n")
+        cache = tmp_path.joinpath("cache.json")
+        output = str(tmp_path.joinpath("out.pot"))
+        self.run("--cache", str(cache), "-o", output, str(tmp_path))
+        expressions = json.loads(cache.read_text())["expressions"]
+        assert u"_(u'Expression')" in [source for (_, source, _) in expressions]
+
+    def test_template_expressions_with_jobs(self, tmp_path, monkeypatch):
+        def expression_stats(template):
+            monkeypatch.setattr(expression_cache, "entries", OrderedDict())
+            monkeypatch.setattr(expression_cache, "hits", 0)
+            monkeypatch.setattr(expression_cache, "misses", 0)
+            for i in range(2):
+                source.joinpath("page%d.pt" % i).write_text(template)
+            args = ["-j", "2", "--cache", str(cache), "--stats"]
+            args += ["--stats-format=json", "-o", output, str(source)]
+            return json.loads(self.run(*args).stderr)["expression_cache"]
+
+        source = tmp_path.joinpath("src")
+        source.mkdir()
+        cache = tmp_path.joinpath("cache.json")
+        output = str(tmp_path.joinpath("out.pot"))
+        stats = expression_stats(u"<p>${_(u'Expression')}</p>\n")
+        assert stats["hits"] + stats["misses"] == 2
+        expressions = json.loads(cache.read_text())["expressions"]
+        assert u"_(u'Expression')" in [text for (_, text, _) in expressions]
+        # The workers start with the expressions from the cache file.
+        stats = expression_stats(u"<div>${_(u'Expression')}</div>\n")
+        assert stats == {"hits": 2, "misses": 0}
+
+    def test_exclude(self, tmp_path):
+        _write_sources(tmp_path, 2)
+        tmp_path.joinpath("vendor").mkdir()
+        tmp_path.joinpath("vendor", "lib.py").write_text(u"_(u'Vendored')\n")
+        output = tmp_path.joinpath("out.pot")
+        self.run("-x", "vendor/", "-x", "module1.py", "-o", str(output), str(tmp_path))
+        assert [e.msgid for e in polib.pofile(str(output))] == [
+            u"Message 0",
+            u"Shared",
+        ]
+
+    def test_stats(self, tmp_path):
+        _write_sources(tmp_path, 3)
+        output = str(tmp_path.joinpath("out.pot"))
+        result = self.run("--stats", "--stats-format=json", "-o", output, str(tmp_path))
+        stats = json.loads(result.stderr)
+        assert stats["files"] == 3
+        assert stats["messages"] == 6
+        assert stats["entries"] == 4
+        assert stats["extractors"]["PythonExtractor"]["files"] == 3
+        assert len(stats["slowest_files"]) == 3
+        assert set(stats["phases"]) >= set(["walk", "extract", "merge", "save"])
+
+    def test_stats_skipped_files(self, tmp_path):
+        _write_sources(tmp_path, 2)
+        tmp_path.joinpath("plain.py").write_text(u"import os\nx = os.sep\n")
+        output = str(tmp_path.joinpath("out.pot"))
+        result = self.run("--stats", "--stats-format=json", "-o", output, str(tmp_path))
+        stats = json.loads(result.stderr)
+        assert stats["files"] == 3
+        assert stats["skipped_files"] == 1
+        assert stats["extractors"]["PythonExtractor"]["skipped_files"] == 1
+
+    def test_stats_before_sources(self, tmp_path):
+        _write_sources(tmp_path, 1)
+        output = str(tmp_path.joinpath("out.pot"))
+        result = self.run("-o", output, "--stats", str(tmp_path))
+        assert "1 files (0 from cache, 0 skipped)" in result.stderr
+
+    def test_ndjson_output(self, tmp_path):
+        tmp_path.joinpath("module.py").write_text(
+            u"_(u'one')\nngettext(u'a cow', u'%d cows', 2)\n"
+        )
+        output = tmp_path.joinpath("messages.ndjson")
+        self.run("--format", "ndjson", "-o", str(output), str(tmp_path))
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [(r["msgid"], r["msgid_plural"]) for r in records] == [
+            (u"one", None),
+            (u"a cow", u"%d cows"),
+        ]
+        assert records[0]["location"] == [str(tmp_path.joinpath("module.py")), 1]
+
+    def test_ndjson_to_stdout(self, tmp_path):
+        _write_sources(tmp_path, 2)
+        result = self.run("--format=ndjson", "-o", "-", str(tmp_path))
+        assert len(result.stdout.splitlines()) == 4
+
+    def test_ndjson_defaults_to_stdout(self, tmp_path, monkeypatch):
+        _write_sources(tmp_path, 2)
+        monkeypatch.chdir(tmp_path)
+        result = self.run("--format=ndjson", str(tmp_path))
+        assert len(result.stdout.splitlines()) == 4
+        assert not tmp_path.joinpath("messages.pot").exists()
+
+    def test_pot_to_stdout(self, tmp_path):
+        _write_sources(tmp_path, 1)
+        result = self.run("-o", "-", str(tmp_path))
+        assert [e.msgid for e in polib.pofile(result.stdout)] == [
+            u"Message 0",
+            u"Shared",
+        ]
+
+    def test_ndjson_can_not_watch(self, tmp_path):
+        result = CliRunner().invoke(main, ["--format=ndjson", "--watch", str(tmp_path)])
+        assert result.exit_code == 2
+
+    def test_watch_refreshes_cache(self, tmp_path, monkeypatch):
+        source = tmp_path.joinpath("src", "module.py")
+        source.parent.mkdir()
+        source.write_text(u"_(u'Original')\n")
+        output = tmp_path.joinpath("out.pot")
+        cache = tmp_path.joinpath("cache.json")
+        broken = tmp_path.joinpath("src", "broken.py")
+
+        def fake_watch_files(list_sources, watched):
+            source.write_text(u"_(u'Changed')\n")
+            broken.write_text(u"_(u'broken'\n")
+            filenames = list(list_sources())
+            yield (filenames, [str(broken), str(source)])
+            raise KeyboardInterrupt()
+
+        monkeypatch.setattr("lingua.extract.watch_files", fake_watch_files)
+        result = self.run(
+            "--watch", "--cache", str(cache), "-o", str(output), str(source.parent)
+        )
+        assert "Parse error" in result.output
+        assert [e.msgid for e in polib.pofile(str(output))] == [u"Changed"]
+        entry = json.loads(cache.read_text())["files"][str(source)]
+        assert [message[1] for message in entry["messages"]] == [u"Changed"]
+
+    def test_max_locations(self, tmp_path):
+        _write_sources(tmp_path, 3)
+        output = tmp_path.joinpath("out.pot")
+        self.run(
+            "--max-locations=2", "--count-locations", "-o", str(output), str(tmp_path)
+        )
+        entry = polib.pofile(str(output)).find(u"Shared")
+        assert len(entry.occurrences) == 2
+        assert entry.comment == u"1 more location not listed"
@@ -0,0 +1,150 @@
+import gettext
+import io
+import struct
+import polib
+from click.testing import CliRunner
+from lingua.mocompile import build_hash_table
+from lingua.mocompile import compile_file
+from lingua.mocompile import hash_string
+from lingua.mocompile import hash_table_size
+from lingua.mocompile import main
+from lingua.mocompile import mo_data
+
+
+PO_FILE = u"""\
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\\n"
+
+msgid "Cancel"
+msgstr "Annuleren"
+
+msgctxt "button"
+msgid "Open"
+msgstr "Openen"
+
+msgid "file"
+msgid_plural "files"
+msgstr[0] "bestand"
+msgstr[1] "bestanden"
+
+#, fuzzy
+msgid "Fuzzy"
+msgstr "Vaag"
+
+msgid "Empty"
+msgstr ""
+"""
+
+
+def gnu_lookup(data, original):
+    """Find a message using the hash table, like the GNU gettext runtime."""
+    (count, originals, translations, size, offset) = struct.unpack(
+        "<5I", data[8:28]
+    )
+    hval = hash_string(original)
+    slot = hval % size
+    increment = 1 + (hval % (size - 2))
+    while True:
+        index = struct.unpack("<I", data[offset + slot * 4 : offset + slot * 4 + 4])[0]
+        if not index:
+            return None
+        (length, start) = struct.unpack(
+            "<II", data[originals + (index - 1) * 8 : originals + index * 8]
+        )
+        if data[start : start + length].split(b"\0")[0] == original:
+            (length, start) = struct.unpack(
+                "<II", data[translations + (index - 1) * 8 : translations + index * 8]
+            )
+            return data[start : start + length]
+        if slot >= size - increment:
+            slot -= size - increment
+        else:
+            slot += increment
+
+
+def test_hash_string():
+    assert hash_string(b"") == 0
+    assert hash_string(b"a") == 97
+    assert hash_string(b"ab\0cd") == hash_string(b"ab")
+    # Adding the last byte carries past 32 bits here; gettext hashes this
+    # string to 239.
+    assert hash_string(b"\xf0\xf0\xf0\xf0\xf0\xff\xff") == 239
+
+
+def test_hash_table_size():
+    assert hash_table_size(0) == 3
+    assert hash_table_size(3) == 5
+    assert hash_table_size(100) == 137
+
+
+def test_hash_table_has_all_messages():
+    originals = [("message %d" % i).encode("ascii") for i in range(500)]
+    table = build_hash_table(originals)
+    assert sorted(index for index in table if index) == list(range(1, 501))
+
+
+class Test_mo_data(object):
+    def test_readable_by_gettext(self):
+        data = mo_data(polib.pofile(PO_FILE))
+        translations = gettext.GNUTranslations(io.BytesIO(data))
+        assert translations.gettext("Cancel") == u"Annuleren"
+        assert translations.pgettext("button", "Open") == u"Openen"
+        assert translations.ngettext("file", "files", 2) == u"bestanden"
+        assert translations.gettext("Fuzzy") == u"Fuzzy"
+        assert translations.gettext("Empty") == u"Empty"
+
+    def test_use_fuzzy(self):
+        data = mo_data(polib.pofile(PO_FILE), use_fuzzy=True)
+        translations = gettext.GNUTranslations(io.BytesIO(data))
+        assert translations.gettext("Fuzzy") == u"Vaag"
+
+    def test_hash_table_lookup(self):
+        data = mo_data(polib.pofile(PO_FILE))
+        assert gnu_lookup(data, b"Cancel") == b"Annuleren"
+        assert gnu_lookup(data, b"button\x04Open") == b"Openen"
+        assert gnu_lookup(data, b"file") == b"bestand\0bestanden"
+        assert gnu_lookup(data, b"Fuzzy") is None
+        assert gnu_lookup(data, b"").startswith(b"Content-Type")
+
+
+class Test_compile_file(object):
+    def test_skip_unchanged_source(self, tmp_path):
+        source = tmp_path.joinpath("nl.po")
+        source.write_text(PO_FILE)
+        target = str(tmp_path.joinpath("nl.mo"))
+        assert compile_file(str(source), target) == 3
+        assert compile_file(str(source), target) is None
+        assert compile_file(str(source), target, force=True) == 3
+        assert compile_file(str(source), target, use_fuzzy=True) == 4
+        source.write_text(PO_FILE.replace(u"Annuleren", u"Afbreken"))
+        assert compile_file(str(source), target, use_fuzzy=True) == 4
+
+    def test_recompile_foreign_mo_file(self, tmp_path):
+        source = tmp_path.joinpath("nl.po")
+        source.write_text(PO_FILE)
+        target = tmp_path.joinpath("nl.mo")
+        target.write_bytes(polib.pofile(PO_FILE).to_binary())
+        assert compile_file(str(source), str(target)) == 3
+
+
+class Test_main(object):
+    def test_compile_files(self, tmp_path):
+        for lang in ["nl", "de"]:
+            tmp_path.joinpath("%s.po" % lang).write_text(PO_FILE)
+        args = [str(tmp_path.joinpath("nl.po")), str(tmp_path.joinpath("de.po"))]
+        result = CliRunner().invoke(main, ["--jobs", "2"] + args)
+        assert result.exit_code == 0, result.output
+        assert result.output.splitlines() == [
+            "%s: 3 messages" % tmp_path.joinpath("nl.mo"),
+            "%s: 3 messages" % tmp_path.joinpath("de.mo"),
+        ]
+        result = CliRunner().invoke(main, args)
+        assert "%s is up to date" % tmp_path.joinpath("de.mo") in result.output
+
+    def test_output_requires_single_file(self, tmp_path):
+        tmp_path.joinpath("nl.po").write_text(PO_FILE)
+        source = str(tmp_path.joinpath("nl.po"))
+        result = CliRunner().invoke(main, ["-o", "x.mo", source, source])
+        assert result.exit_code == 2
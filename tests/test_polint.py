@@ -0,0 +1,37 @@
+from click.testing import CliRunner
+from lingua.polint import check_po
+from lingua.polint import main
+
+
+PO_FILE = u"""\
+msgid "Cancel"
+msgstr "Stop"
+
+msgid "Abort"
+msgstr "Stop"
+"""
+
+
+def test_check_po(tmp_path):
+    po = tmp_path.joinpath("nl.po")
+    po.write_text(PO_FILE)
+    report = check_po(str(po), False)
+    assert report.splitlines()[:3] == [
+        "Translation:",
+        "        Stop",
+        "Used for 2 canonical texts:",
+    ]
+
+
+def test_parallel_report_in_input_order(tmp_path):
+    paths = []
+    for i in range(6):
+        po = tmp_path.joinpath("%d.po" % i)
+        po.write_text(PO_FILE)
+        paths.append(str(po))
+    serial = CliRunner().invoke(main, paths)
+    parallel = CliRunner().invoke(main, ["--jobs", "3"] + paths)
+    assert parallel.exit_code == 0, parallel.output
+    assert parallel.output == serial.output
+    leaders = [line for line in parallel.output.splitlines() if line.startswith("[")]
+    assert leaders == ["[%s] Translation:" % path for path in paths]
@@ -0,0 +1,172 @@
+import os
+import polib
+from click.testing import CliRunner
+from lingua.poupdate import FuzzyIndex
+from lingua.poupdate import main
+from lingua.poupdate import merge_catalog
+
+
+def make_catalog(entries, **metadata):
+    catalog = polib.POFile()
+    catalog.metadata = {"Content-Type": "text/plain; charset=UTF-8"}
+    catalog.metadata.update(metadata)
+    for entry in entries:
+        catalog.append(entry)
+    return catalog
+
+
+class TestFuzzyIndex(object):
+    def index(self, *msgids):
+        return FuzzyIndex(polib.POEntry(msgid=msgid) for msgid in msgids)
+
+    def test_find_similar_message(self):
+        index = self.index(u"Cancel", u"Save the documents", u"Open a file")
+        assert index.search(u"Save the document").msgid == u"Save the documents"
+
+    def test_no_similar_message(self):
+        index = self.index(u"Cancel", u"Save the documents")
+        assert index.search(u"Completely different") is None
+
+    def test_best_match_wins(self):
+        index = self.index(u"Delete this item", u"Delete the items", u"Delete items")
+        assert index.search(u"Delete the item").msgid == u"Delete the items"
+
+    def test_candidates_only_share_trigrams(self):
+        index = self.index(u"abcdef", u"uvwxyz")
+        assert index.candidates(u"abcdeg") == [0]
+
+    def test_short_messages(self):
+        index = self.index(u"Close", u"No")
+        assert index.search(u"Closed").msgid == u"Close"
+
+
+class Test_merge_catalog(object):
+    def test_keep_translation(self):
+        template = make_catalog(
+            [polib.POEntry(msgid=u"Cancel", occurrences=[("a.py", "2")])]
+        )
+        catalog = make_catalog(
+            [
+                polib.POEntry(
+                    msgid=u"Cancel",
+                    msgstr=u"Annuleren",
+                    tcomment=u"Note",
+                    occurrences=[("old.py", "1")],
+                )
+            ]
+        )
+        (result, counts) = merge_catalog(template, catalog)
+        assert [(e.msgid, e.msgstr, e.tcomment) for e in result] == [
+            (u"Cancel", u"Annuleren", u"Note")
+        ]
+        assert result[0].occurrences == [("a.py", "2")]
+        assert counts["translated"] == 1
+
+    def test_new_messages(self):
+        template = make_catalog(
+            [polib.POEntry(msgid=u"one", msgid_plural=u"%d", occurrences=[])]
+        )
+        catalog = make_catalog([], **{"Plural-Forms": "nplurals=3; plural=0;"})
+        (result, counts) = merge_catalog(template, catalog)
+        assert result[0].msgstr_plural == {0: u"", 1: u"", 2: u""}
+        assert counts["untranslated"] == 1
+
+    def test_fuzzy_match(self):
+        template = make_catalog([polib.POEntry(msgid=u"Save the document")])
+        catalog = make_catalog(
+            [polib.POEntry(msgid=u"Save the documents", msgstr=u"Opslaan")]
+        )
+        (result, counts) = merge_catalog(template, catalog, previous=True)
+        entry = result.find(u"Save the document")
+        assert entry.msgstr == u"Opslaan"
+        assert entry.fuzzy
+        assert entry.previous_msgid == u"Save the documents"
+        assert counts["fuzzy"] == 1
+
+    def test_no_fuzzy_matching(self):
+        template = make_catalog([polib.POEntry(msgid=u"Save the document")])
+        catalog = make_catalog(
+            [polib.POEntry(msgid=u"Save the documents", msgstr=u"Opslaan")]
+        )
+        (result, counts) = merge_catalog(template, catalog, fuzzy_matching=False)
+        assert result.find(u"Save the document").msgstr == u""
+
+    def test_obsolete_messages(self):
+        template = make_catalog([polib.POEntry(msgid=u"Cancel")])
+        catalog = make_catalog(
+            [
+                polib.POEntry(msgid=u"Gone", msgstr=u"Weg"),
+                polib.POEntry(msgid=u"Untranslated"),
+            ]
+        )
+        (result, counts) = merge_catalog(template, catalog, fuzzy_matching=False)
+        assert [(e.msgid, e.obsolete) for e in result] == [
+            (u"Cancel", False),
+            (u"Gone", True),
+        ]
+        assert counts["obsolete"] == 1
+
+    def test_revive_obsolete_message(self):
+        template = make_catalog([polib.POEntry(msgid=u"Back")])
+        catalog = make_catalog(
+            [polib.POEntry(msgid=u"Back", msgstr=u"Terug", obsolete=True)]
+        )
+        (result, counts) = merge_catalog(template, catalog)
+        assert [(e.msgid, e.msgstr, e.obsolete) for e in result] == [
+            (u"Back", u"Terug", False)
+        ]
+
+    def test_plural_changed(self):
+        template = make_catalog([polib.POEntry(msgid=u"file", msgid_plural=u"files")])
+        catalog = make_catalog([polib.POEntry(msgid=u"file", msgstr=u"bestand")])
+        (result, counts) = merge_catalog(template, catalog)
+        assert result[0].msgstr_plural == {0: u"bestand", 1: u""}
+        assert result[0].fuzzy
+
+    def test_update_creation_date(self):
+        template = make_catalog([], **{"POT-Creation-Date": "2026-01-01"})
+        catalog = make_catalog([], **{"POT-Creation-Date": "2000-01-01"})
+        (result, counts) = merge_catalog(template, catalog)
+        assert result.metadata["POT-Creation-Date"] == "2026-01-01"
+
+
+class Test_main(object):
+    def test_update_files(self, tmp_path):
+        template = make_catalog([polib.POEntry(msgid=u"Cancel")])
+        template.save(str(tmp_path.joinpath("messages.pot")))
+        catalog = make_catalog([polib.POEntry(msgid=u"Gone", msgstr=u"Weg")])
+        po = tmp_path.joinpath("nl.po")
+        catalog.save(str(po))
+        args = [str(tmp_path.joinpath("messages.pot")), str(po)]
+        result = CliRunner().invoke(main, args)
+        assert result.exit_code == 0, result.output
+        assert "0 translated, 0 fuzzy, 1 untranslated, 1 obsolete" in result.output
+        assert [(e.msgid, bool(e.obsolete)) for e in polib.pofile(str(po))] == [
+            (u"Cancel", False),
+            (u"Gone", True),
+        ]
+        result = CliRunner().invoke(main, args)
+        assert "(unchanged)" in result.output
+
+    def test_keep_file_mode(self, tmp_path):
+        template = make_catalog([polib.POEntry(msgid=u"Cancel")])
+        template.save(str(tmp_path.joinpath("messages.pot")))
+        po = tmp_path.joinpath("nl.po")
+        make_catalog([]).save(str(po))
+        po.chmod(0o644)
+        args = [str(tmp_path.joinpath("messages.pot")), str(po)]
+        result = CliRunner().invoke(main, args)
+        assert result.exit_code == 0, result.output
+        assert os.stat(str(po)).st_mode & 0o777 == 0o644
+
+    def test_no_empty_header(self, tmp_path):
+        template = make_catalog([polib.POEntry(msgid=u"Cancel")])
+        template.save(str(tmp_path.joinpath("messages.pot")))
+        po = tmp_path.joinpath("nl.po")
+        po.write_text(u'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n')
+        args = [str(tmp_path.joinpath("messages.pot")), str(po)]
+        result = CliRunner().invoke(main, args)
+        assert result.exit_code == 0, result.output
+        assert po.read_text().startswith(u'msgid ""\n')
+        result = CliRunner().invoke(main, args)
+        assert "(unchanged)" in result.output
@@ -0,0 +1,65 @@
+import json
+from lingua.stats import ExtractionStats
+
+
+class TestExtractionStats(object):
+    def test_nested_phases_are_exclusive(self, monkeypatch):
+        stats = ExtractionStats()
+        clock = iter([0.0, 1.0, 3.0, 6.0])
+        monkeypatch.setattr("lingua.stats.time.perf_counter", lambda: next(clock))
+        with stats.phase("outer"):
+            with stats.phase("inner"):
+                pass
+        assert stats.phases == {"outer": 4.0, "inner": 2.0}
+
+    def test_timed(self):
+        stats = ExtractionStats()
+        assert list(stats.timed("walk", [1, 2, 3])) == [1, 2, 3]
+        assert list(stats.phases) == ["walk"]
+
+    def test_add_file(self):
+        stats = ExtractionStats()
+        stats.add_file("a.py", "PythonExtractor", 1.0, 3)
+        stats.add_file("b.py", "PythonExtractor", 0.0, 2, cached=True)
+        stats.add_file("c.pt", "ChameleonExtractor", 2.0, 1)
+        stats.add_file("d.py", "PythonExtractor", 0.5, 0, skipped=True)
+        assert stats.files == 4
+        assert stats.cached_files == 1
+        assert stats.skipped_files == 1
+        assert stats.messages == 6
+        assert stats.extractors["PythonExtractor"] == {
+            "files": 3,
+            "cached_files": 1,
+            "skipped_files": 1,
+            "messages": 5,
+            "seconds": 1.5,
+        }
+
+    def test_slowest_files(self):
+        stats = ExtractionStats(slowest=2)
+        for (i, elapsed) in enumerate([0.5, 3.0, 1.0, 2.0]):
+            stats.add_file("file%d.py" % i, "PythonExtractor", elapsed, 1)
+        assert stats.slowest_files() == [(3.0, "file1.py"), (2.0, "file3.py")]
+
+    def test_format_json(self):
+        stats = ExtractionStats()
+        stats.add_file("a.py", "PythonExtractor", 1.0, 3)
+        data = json.loads(stats.format_json())
+        assert data["files"] == 1
+        assert data["slowest_files"] == [{"filename": "a.py", "seconds": 1.0}]
+
+    def test_format_text(self):
+        stats = ExtractionStats()
+        stats.add_file("a.py", "PythonExtractor", 1.0, 3)
+        text = stats.format_text()
+        assert "PythonExtractor" in text
+        assert "1 files (0 from cache, 0 skipped), 3 messages" in text
+
+    def test_format_expression_cache(self):
+        stats = ExtractionStats()
+        assert "Expression cache" not in stats.format_text()
+        stats.expression_hits = 5
+        stats.expression_misses = 2
+        assert "Expression cache: 5 hits, 2 misses" in stats.format_text()
+        data = json.loads(stats.format_json())
+        assert data["expression_cache"] == {"hits": 5, "misses": 2}
@@ -0,0 +1,171 @@
+import os
+import re
+import pytest
+from lingua.walk import IgnoreRules
+from lingua.walk import PathRoutes
+from lingua.walk import Walker
+from lingua.walk import translate_pattern
+
+
+def _match(pattern, path):
+    return re.match(translate_pattern(pattern), path) is not None
+
+
+class Test_translate_pattern(object):
+    def test_unanchored_pattern_matches_at_any_level(self):
+        assert _match("*.py", "foo.py")
+        assert _match("*.py", "src/foo.py")
+        assert not _match("*.py", "foo.pyc")
+
+    def test_star_does_not_match_separator(self):
+        assert _match("src/*.py", "src/foo.py")
+        assert not _match("src/*.py", "src/sub/foo.py")
+
+    def test_anchored_pattern(self):
+        assert _match("/build", "build")
+        assert not _match("/build", "src/build")
+
+    def test_double_star(self):
+        assert _match("**/test", "test")
+        assert _match("**/test", "a/b/test")
+        assert _match("src/**", "src/a/b.py")
+        assert _match("a/**/b", "a/b")
+        assert _match("a/**/b", "a/x/y/b")
+
+    def test_question_mark_and_class(self):
+        assert _match("file?.py", "file1.py")
+        assert not _match("file?.py", "file/.py")
+        assert _match("file[0-9].py", "file3.py")
+        assert not _match("file[!0-9].py", "file3.py")
+
+
+class TestIgnoreRules(object):
+    def test_no_rules(self):
+        assert not IgnoreRules().match("foo.py")
+
+    def test_negation(self):
+        rules = IgnoreRules(["*.py", "!keep.py"])
+        assert rules.match("foo.py")
+        assert not rules.match("keep.py")
+
+    def test_last_rule_wins(self):
+        rules = IgnoreRules(["!keep.py", "*.py"])
+        assert rules.match("keep.py")
+
+    def test_directory_only(self):
+        rules = IgnoreRules(["build/"])
+        assert rules.match("build", is_dir=True)
+        assert not rules.match("build", is_dir=False)
+
+    def test_from_file(self):
+        rules = IgnoreRules.from_file(["# comment\n", "\n", "*.pyc  \n", "\\#x\n"])
+        assert rules.match("foo.pyc")
+        assert rules.match("#x")
+        assert not rules.match("# comment")
+
+
+def _touch(path):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    open(path, "w").close()
+
+
+class TestWalker(object):
+    def test_same_files_as_os_walk(self, tmpdir):
+        root = str(tmpdir)
+        for path in ["a.py", "b/c.py", "b/d/e.py", "f/g.py"]:
+            _touch(os.path.join(root, path))
+        expected = [
+            os.path.join(dirpath, filename)
+            for (dirpath, dirnames, filenames) in os.walk(root)
+            for filename in filenames
+        ]
+        assert sorted(Walker().walk(root)) == sorted(expected)
+
+    def test_prune_excluded_directory(self, tmpdir, monkeypatch):
+        root = str(tmpdir)
+        _touch(os.path.join(root, "src", "a.py"))
+        _touch(os.path.join(root, "node_modules", "b", "c.py"))
+        scanned = []
+        scandir = os.scandir
+
+        def fake_scandir(path):
+            scanned.append(path)
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", fake_scandir)
+        walker = Walker(IgnoreRules(["node_modules/"]))
+        assert list(walker.walk(root)) == [os.path.join(root, "src", "a.py")]
+        assert not [path for path in scanned if "node_modules" in path]
+
+    def test_anchored_exclude(self, tmpdir):
+        root = str(tmpdir)
+        _touch(os.path.join(root, "build", "a.py"))
+        _touch(os.path.join(root, "src", "build", "b.py"))
+        walker = Walker(IgnoreRules(["/build"]))
+        assert list(walker.walk(root)) == [os.path.join(root, "src", "build", "b.py")]
+
+    def test_walk_again_only_lists_changed_directories(self, tmpdir, monkeypatch):
+        root = str(tmpdir)
+        _touch(os.path.join(root, "a", "b.py"))
+        _touch(os.path.join(root, "c", "d.py"))
+        walker = Walker()
+        assert len(list(walker.walk(root))) == 2
+        scanned = []
+        scandir = os.scandir
+
+        def fake_scandir(path):
+            scanned.append(path)
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", fake_scandir)
+        walker.reset()
+        assert len(list(walker.walk(root))) == 2
+        assert scanned == []
+        _touch(os.path.join(root, "c", "e.py"))
+        st = os.stat(os.path.join(root, "c"))
+        os.utime(os.path.join(root, "c"), ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        walker.reset()
+        assert len(list(walker.walk(root))) == 3
+        assert scanned == [os.path.join(root, "c")]
+
+    @pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks not supported")
+    def test_symlinks_visited_once(self, tmpdir):
+        root = str(tmpdir)
+        _touch(os.path.join(root, "src", "a.py"))
+        os.symlink(os.path.join(root, "src"), os.path.join(root, "link"))
+        os.symlink(root, os.path.join(root, "src", "loop"))
+        files = list(Walker().walk(root))
+        assert len(files) == 1
+        assert os.path.realpath(files[0]) == os.path.join(
+            os.path.realpath(root), "src", "a.py"
+        )
+
+
+class TestPathRoutes(object):
+    def test_no_routes(self):
+        routes = PathRoutes()
+        assert not routes
+        assert routes.match("foo.py") is None
+
+    def test_first_match_wins(self):
+        routes = PathRoutes()
+        routes.add("templates/**/*.html", "chameleon")
+        routes.add("*.html", "")
+        assert routes.match("templates/a/b.html") == "chameleon"
+        assert routes.match("static/b.html") == ""
+        assert routes.match("static/b.py") is None
+
+    def test_directory_pattern(self):
+        routes = PathRoutes()
+        routes.add("legacy/", "")
+        assert routes.match("legacy/a/b.py") == ""
+        assert routes.match("src/legacy.py") is None
+
+    def test_add_after_match(self):
+        routes = PathRoutes()
+        routes.add("*.txt", "python")
+        assert routes.match("a.html") is None
+        routes.add("*.html", "xml")
+        assert routes.match("a.html") == "xml"
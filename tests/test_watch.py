@@ -0,0 +1,37 @@
+import os
+from lingua.watch import snapshot
+from lingua.watch import watch_files
+
+
+def _touch(path, text=u"x"):
+    path.write_text(text)
+    st = os.stat(str(path))
+    os.utime(str(path), ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_snapshot_skips_missing_files(tmp_path):
+    a = tmp_path.joinpath("a.py")
+    a.write_text(u"")
+    assert list(snapshot([str(a), str(tmp_path.joinpath("b.py"))])) == [str(a)]
+
+
+def test_watch_reports_changed_files(tmp_path):
+    a = tmp_path.joinpath("a.py")
+    b = tmp_path.joinpath("b.py")
+    a.write_text(u"")
+    b.write_text(u"")
+    filenames = [str(a), str(b)]
+    watcher = watch_files(lambda: filenames, snapshot(filenames), interval=0)
+    _touch(b)
+    assert next(watcher) == ([str(a), str(b)], [str(b)])
+
+
+def test_watch_reports_removed_files(tmp_path):
+    a = tmp_path.joinpath("a.py")
+    b = tmp_path.joinpath("b.py")
+    a.write_text(u"")
+    b.write_text(u"")
+    filenames = [str(a), str(b)]
+    watcher = watch_files(lambda: filenames, snapshot(filenames), interval=0)
+    b.unlink()
+    assert next(watcher) == ([str(a)], [])